@@ -1,9 +1,17 @@
 # Stripe Integrations Stuff
+from stripe_integrations.actions.aio import (
+    AsyncStripeCard,
+    AsyncStripeCustomer,
+    AsyncStripeSubscription,
+    AsyncStripeWebhook,
+)
 from stripe_integrations.actions.coupons import StripeCoupon
 from stripe_integrations.actions.customers import StripeCustomer
 from stripe_integrations.actions.events import StripeEvent
 from stripe_integrations.actions.prices import StripePrice
 from stripe_integrations.actions.products import StripeProduct
+from stripe_integrations.actions.snapshots import StripeSnapshot
 from stripe_integrations.actions.sources import StripeCard
 from stripe_integrations.actions.subscriptions import StripeSubscription
+from stripe_integrations.actions.sync import StripeSyncState
 from stripe_integrations.actions.webhooks import StripeWebhook
@@ -0,0 +1,101 @@
+# Standard Library
+import functools
+
+# Third Party Stuff
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions.customers import StripeCustomer
+from stripe_integrations.actions.sources import StripeCard
+from stripe_integrations.actions.subscriptions import StripeSubscription
+from stripe_integrations.actions.webhooks import StripeWebhook
+
+
+def database(func):
+    """
+    Returns a coroutine function running func, which only uses the ORM, in the
+    thread of the current request. Calls run one at a time
+    """
+    return sync_to_async(func, thread_sensitive=True)
+
+
+def stripe_request(func):
+    """
+    Returns a coroutine function running func, which is bound by its Stripe
+    API requests, in a thread of its own so that concurrent calls overlap.
+    The thread uses its own database connection, outside of any transaction
+    of the current request
+    """
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+class AsyncActions:
+    """
+    Base of the async counterparts of an action class
+    actions: the action class
+    stripe_methods: the classmethods of `actions` which make Stripe API
+    requests, run concurrently, see `stripe_request`
+    database_methods: the classmethods of `actions` which only use the ORM,
+    run one at a time in the thread of the current request, see `database`
+    Other classmethods aren't available, as they wouldn't benefit from running
+    in a coroutine
+    """
+
+    actions = None
+    stripe_methods = ()
+    database_methods = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.stripe_methods:
+            setattr(cls, name, staticmethod(stripe_request(getattr(cls.actions, name))))
+        for name in cls.database_methods:
+            setattr(cls, name, staticmethod(database(getattr(cls.actions, name))))
+        for name, attr in vars(cls.actions).items():
+            if name.isupper():
+                setattr(cls, name, attr)
+
+
+class AsyncStripeCustomer(AsyncActions):
+    actions = StripeCustomer
+    stripe_methods = ("create", "sync")
+    database_methods = ("get", "soft_delete")
+
+
+class AsyncStripeCard(AsyncActions):
+    actions = StripeCard
+    stripe_methods = ("set_default_card", "delete_card")
+    database_methods = ("get_for_customer",)
+
+
+class AsyncStripeSubscription(AsyncActions):
+    actions = StripeSubscription
+    stripe_methods = (
+        "create",
+        "update",
+        "cancel",
+        "get_stripe_subscription",
+        "get_upcoming_invoice",
+        "get_latest_invoice",
+    )
+    database_methods = (
+        "has_active_subscription",
+        "get_current_subscription",
+        "get_subscription",
+    )
+
+
+class AsyncStripeWebhook(AsyncActions):
+    actions = StripeWebhook
+    # the events are stored and processed in the transaction of the request
+    database_methods = ("process_signed_webhook", "process_webhook")
@@ -1,26 +1,29 @@
+# Standard Library
+import itertools
+
 # Third Party Stuff
 import stripe
 from django.utils import timezone
 
 # Stripe Integrations Stuff
 from stripe_integrations import utils
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import bulk_upsert_changed, update_or_create
 from stripe_integrations.settings import stripe_settings
 
 
 class StripeCoupon:
     @classmethod
-    def sync(cls, stripe_coupon):
+    def get_defaults(cls, stripe_coupon):
         """
-        Sync stripe coupons data
+        Returns the field values of a coupon from the Stripe API
         Note:
             applies_to: This key is not received from stripe
             when the coupon is not applied to specific product
         Args:
             stripe_coupon: Stripe coupon object
-        Retruns:
-            coupon object, is_created status (Boolean)
         """
-        defaults = dict(
+        return dict(
             amount_off=(
                 utils.convert_amount_for_db(
                     stripe_coupon["amount_off"], stripe_coupon["currency"]
@@ -44,26 +47,105 @@ class StripeCoupon:
             livemode=stripe_coupon["livemode"],
         )
 
-        coupon, is_created = stripe_settings.COUPON_MODEL.objects.update_or_create(
-            stripe_id=stripe_coupon["id"], defaults=defaults
+    @classmethod
+    def sync(cls, stripe_coupon):
+        """
+        Sync stripe coupons data
+        Args:
+            stripe_coupon: Stripe coupon object
+        Retruns:
+            coupon object, is_created status (Boolean)
+        """
+        defaults = cls.get_defaults(stripe_coupon)
+        coupon, is_created = update_or_create(
+            stripe_settings.COUPON_MODEL,
+            stripe_id=stripe_coupon["id"],
+            defaults=defaults,
         )
         return coupon, is_created
 
     @classmethod
-    def sync_all(cls):
+    def sync_all(cls, concurrency=1, incremental=False, shard=None):
         """
         Synchronizes all coupons from the Stripe API
+        Args:
+            concurrency: the number of pages of coupons synced at the same time
+            incremental: only sync the coupons changed since the previous sync,
+            when its checkpoint allows it
+            shard: optionally, only sync the coupons of this shard. The deleted
+            coupons are soft deleted once every shard is synced
         Retruns:
             list of coupons that is synced
         """
-        strip_coupons = stripe.Coupon.auto_paging_iter(expand=["data.applies_to"])
-        coupons = []
+        if incremental:
+            changed = StripeSyncState.sync_changes(
+                "coupons",
+                ["coupon.created", "coupon.updated", "coupon.deleted"],
+                cls.sync_from_event,
+                shard=shard,
+            )
+            if changed is not None:
+                return [coupon for coupon in changed if coupon is not None]
 
-        for coupon in strip_coupons:
-            obj, _ = cls.sync(coupon)
-            coupons.append(obj)
+        results, generations = StripeSyncState.sync_list(
+            "coupons",
+            stripe.Coupon.list,
+            cls.sync_many,
+            concurrency=concurrency,
+            shard=shard,
+            limit=100,
+            expand=["data.applies_to"],
+        )
+
+        # sync deleted coupons
+        if generations:
+            StripeSyncState.sweep(stripe_settings.COUPON_MODEL, generations)
+        return list(itertools.chain.from_iterable(results))
+
+    @classmethod
+    def sync_from_event(cls, event_data):
+        """
+        Synchronizes a coupon from an event of its change
+        Args:
+            event_data: data from Stripe API representing the event
+        Retruns:
+            the coupon object, None if it was deleted
+        """
+        coupon = event_data["data"]["object"]
+        if event_data["type"] == "coupon.deleted":
+            cls.soft_delete(coupon["id"])
+            return None
+        return cls.sync(coupon)[0]
 
-        return coupons
+    @classmethod
+    def sync_many(cls, coupons, generation=None):
+        """
+        Synchronizes a list of coupons from the Stripe API, written in batches
+        of SYNC_BATCH_SIZE coupons
+        Args:
+            coupons: data from Stripe API representing the coupons
+            generation: optionally, the generation of the full sync which
+            found the coupons
+        Returns:
+            list of the coupon objects
+        """
+        if not coupons:
+            return []
+
+        sync_fields = {} if generation is None else {"sync_generation": generation}
+        coupon_objs = [
+            stripe_settings.COUPON_MODEL(
+                stripe_id=coupon["id"], **cls.get_defaults(coupon), **sync_fields
+            )
+            for coupon in coupons
+        ]
+        return bulk_upsert_changed(
+            stripe_settings.COUPON_MODEL,
+            coupon_objs,
+            update_fields=cls.get_defaults(coupons[0]).keys(),
+            batch_size=stripe_settings.SYNC_BATCH_SIZE,
+            touch=sync_fields,
+        )
 
     @classmethod
     def get(cls, stripe_id):
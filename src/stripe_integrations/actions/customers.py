@@ -1,15 +1,24 @@
 # Third Party Stuff
 import stripe
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.functions import Collate
 from django.http import Http404
 from django.utils import timezone
 
 # Stripe Integrations Stuff
 from stripe_integrations import utils
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import payload_hash, record_writes
 from stripe_integrations.settings import stripe_settings
 
 
 class StripeCustomer:
+    # Sync scopes
+    SYNC_CUSTOMER = "customer"
+    SYNC_CARDS = "cards"
+    SYNC_SUBSCRIPTIONS = "subscriptions"
+    SYNC_ALL = (SYNC_CUSTOMER, SYNC_CARDS, SYNC_SUBSCRIPTIONS)
+
     @classmethod
     def create(cls, user, billing_email, metadata=None, **kwargs):
         """
@@ -69,6 +78,31 @@ class StripeCustomer:
 
         return getattr(user, stripe_settings.CUSTOMER_FIELD_NAME)
 
+    @classmethod
+    def get_defaults(cls, stripe_customer):
+        """
+        Returns the field values of a customer from the Stripe API
+        Args:
+            stripe_customer: data from the Stripe API representing the customer
+        """
+        return dict(
+            balance=utils.convert_amount_for_db(
+                stripe_customer["balance"], stripe_customer["currency"]
+            ),
+            currency=stripe_customer["currency"] or "",
+            delinquent=stripe_customer["delinquent"],
+            default_source=stripe_customer["default_source"] or "",
+            description=stripe_customer["description"] or "",
+            address=stripe_customer["address"] or "",
+            name=stripe_customer["name"] or "",
+            shipping=stripe_customer["shipping"],
+            tax_exempt=stripe_customer["tax_exempt"],
+            preferred_locales=stripe_customer["preferred_locales"],
+            invoice_prefix=stripe_customer["invoice_prefix"] or "",
+            invoice_settings=stripe_customer["invoice_settings"],
+            metadata=stripe_customer["metadata"],
+        )
+
     @classmethod
     def sync_from_stripe_data(cls, customer, stripe_customer):
         """
@@ -80,64 +114,79 @@ class StripeCustomer:
         Returns:
             a customer object(local customer)
         """
-        customer.balance = utils.convert_amount_for_db(
-            stripe_customer["balance"], stripe_customer["currency"]
+        values = dict(
+            stripe_id=stripe_customer["id"], **cls.get_defaults(stripe_customer)
         )
-        customer.currency = stripe_customer["currency"] or ""
-        customer.delinquent = stripe_customer["delinquent"]
-        customer.default_source = stripe_customer["default_source"] or ""
-        customer.description = stripe_customer["description"] or ""
-        customer.address = stripe_customer["address"] or ""
-        customer.name = stripe_customer["name"] or ""
-        customer.shipping = stripe_customer["shipping"]
-        customer.tax_exempt = stripe_customer["tax_exempt"]
-        customer.preferred_locales = stripe_customer["preferred_locales"]
-        customer.invoice_prefix = stripe_customer["invoice_prefix"] or ""
-        customer.invoice_settings = stripe_customer["invoice_settings"]
-        customer.metadata = stripe_customer["metadata"]
+        values["payload_hash"] = payload_hash(values)
+        if (
+            stripe_settings.SYNC_SKIP_UNCHANGED
+            and not customer._state.adding
+            and customer.payload_hash == values["payload_hash"]
+        ):
+            record_writes(unchanged=1)
+            return customer
+
+        for field, value in values.items():
+            setattr(customer, field, value)
         customer.save()
+        record_writes(written=1)
 
         return customer
 
     @classmethod
-    def sync(cls, customer, stripe_customer=None):
+    def sync(cls, customer, stripe_customer=None, scope=None, subscription_id=None):
         """
         Synchronizes a local Customer object with details from the Stripe API
         Args:
             customer: a Customer object
             stripe_customer: optionally,
             data from the Stripe API representing the customer
+            scope: optionally, the data to sync, any of SYNC_CUSTOMER, SYNC_CARDS
+            and SYNC_SUBSCRIPTIONS, defaults to all of them
+            subscription_id: optionally, the Stripe ID of a single subscription
+            to sync, instead of every subscription of the customer
         Returns:
             a customer object(local customer)
         """
         if not customer.is_active:
+            record_writes(skipped=1)
             return
 
-        if not stripe_customer:
-            stripe_customer = stripe.Customer.retrieve(customer.stripe_id)
+        if scope is None:
+            scope = cls.SYNC_ALL
 
-        if stripe_customer.get("deleted", False):
-            cls.soft_delete(customer)
-            return
+        # The default card is found from the customer details
+        if cls.SYNC_CUSTOMER in scope or cls.SYNC_CARDS in scope:
+            if not stripe_customer:
+                stripe_customer = stripe.Customer.retrieve(customer.stripe_id)
 
-        # Sync customer details
-        customer = cls.sync_from_stripe_data(customer, stripe_customer)
+            if stripe_customer.get("deleted", False):
+                cls.soft_delete(customer)
+                return
+
+            # Sync customer details
+            customer = cls.sync_from_stripe_data(customer, stripe_customer)
 
         # Stripe Integrations Stuff
         from stripe_integrations.actions.sources import StripeCard
         from stripe_integrations.actions.subscriptions import StripeSubscription
 
         # Sync customer card details
-        if customer.default_source:
+        if cls.SYNC_CARDS in scope and customer.default_source:
             stripe_source = stripe.Customer.retrieve_source(
                 customer.stripe_id, customer.default_source
             )
             StripeCard.sync_from_stripe_data(customer, source=stripe_source)
 
         # Sync subscription details
-        subscriptions = stripe.Subscription.auto_paging_iter(
-            customer=customer.stripe_id
-        )
+        if subscription_id is not None:
+            subscriptions = [stripe.Subscription.retrieve(subscription_id)]
+        elif cls.SYNC_SUBSCRIPTIONS in scope:
+            subscriptions = stripe.Subscription.auto_paging_iter(
+                customer=customer.stripe_id
+            )
+        else:
+            subscriptions = []
         for subscription in subscriptions:
             StripeSubscription.sync_from_stripe_data(
                 customer=customer,
@@ -147,38 +196,230 @@ class StripeCustomer:
         return customer
 
     @classmethod
-    def link_customer(cls, event):
+    def sync_all(cls, page_size=100, concurrency=1, shard=None):
         """
-        Links a customer referenced in a webhook event message to the event object
+        Synchronizes all local customers with the Stripe API
+        The customers are listed along with their sources and subscriptions,
+        a page at a time, and the sync resumes from its checkpoint. Deleted
+        customers are not listed by stripe, so once a complete listing that
+        wasn't resumed or sharded has finished, the local customers which were
+        not listed are soft deleted, see `sweep`
         Args:
-            event: the stripe_integrations.stripe.models.Event object to link
+            page_size: the number of customers requested per page
+            concurrency: the number of pages of customers synced at the same time
+            shard: optionally, only sync the customers of this shard, with its
+            own checkpoint. Every shard still lists all the customers
+        Returns:
+            the number of local customers synced
         """
+        state = StripeSyncState.get("customers", shard)
+        # the customers listed before an interruption are unknown
+        resumed = state is not None and bool(state.cursor and state.generation)
+        started = timezone.now()
 
-        if event.kind == "customer.created":
-            return
+        with utils.SortedRuns() as listed:
+
+            def sync_page(stripe_customers, generation):
+                listed.extend(
+                    stripe_customer["id"] for stripe_customer in stripe_customers
+                )
+                return cls.sync_many(stripe_customers)
+
+            results, _ = StripeSyncState.sync_list(
+                "customers",
+                stripe.Customer.list,
+                sync_page,
+                concurrency=concurrency,
+                shard=shard,
+                limit=page_size,
+                expand=["data.sources", "data.subscriptions"],
+            )
+
+            # sync deleted customers
+            if shard is None and not resumed:
+                cls.sweep(listed, started)
+
+        return sum(results)
+
+    @classmethod
+    def sweep(cls, stripe_ids, started):
+        """
+        Soft deletes the active local customers which were not listed by a
+        complete listing of the customers, i.e. the ones deleted in stripe.
+        Customers created locally since the listing started are kept
+        Args:
+            stripe_ids: the sorted stripe ids of the listed customers
+            started: when the listing started
+        Returns:
+            the number of customers soft deleted
+        """
+        local_ids = (
+            stripe_settings.CUSTOMER_MODEL.objects.filter(
+                is_active=True, created_at__lt=started
+            )
+            .exclude(stripe_id="")
+            .order_by(Collate("stripe_id", "C"))
+            .values_list("stripe_id", flat=True)
+        )
+        deleted = 0
+        with transaction.atomic():
+            unlisted = utils.exclude_sorted(
+                local_ids.iterator(chunk_size=2000), stripe_ids
+            )
+            for chunk in utils.chunked(unlisted, 500):
+                deleted += stripe_settings.CUSTOMER_MODEL.objects.filter(
+                    stripe_id__in=chunk
+                ).update(is_active=False, date_purged=timezone.now())
+        return deleted
+
+    @classmethod
+    def sync_many(cls, stripe_customers, fetch_missing=True):
+        """
+        Synchronizes the local customers of a list of Stripe customers, in a
+        single transaction. Stripe customers without a local customer are skipped
+        Args:
+            stripe_customers: data from the Stripe API representing the
+            customers, with their sources and subscriptions expanded
+            fetch_missing: whether to retrieve the default sources and the
+            subscriptions which are not expanded, otherwise only the expanded
+            ones are synced
+        Returns:
+            the number of local customers synced
+        """
+        # Stripe Integrations Stuff
+        from stripe_integrations.actions.sources import StripeCard
+        from stripe_integrations.actions.subscriptions import StripeSubscription
+
+        customers = stripe_settings.CUSTOMER_MODEL.objects.filter(
+            stripe_id__in=[
+                stripe_customer["id"] for stripe_customer in stripe_customers
+            ],
+            is_active=True,
+        )
+        customers = {customer.stripe_id: customer for customer in customers}
+
+        # Fetch what wasn't expanded before writing anything
+        updates = []
+        for stripe_customer in stripe_customers:
+            customer = customers.get(stripe_customer["id"])
+            if customer is None:
+                record_writes(skipped=1)
+                continue
+
+            stripe_source = None
+            default_source = stripe_customer["default_source"]
+            if default_source:
+                sources = stripe_customer.get("sources") or {"data": []}
+                stripe_source = next(
+                    (s for s in sources["data"] if s["id"] == default_source), None
+                )
+                if stripe_source is None and fetch_missing:
+                    stripe_source = stripe.Customer.retrieve_source(
+                        stripe_customer["id"], default_source
+                    )
+
+            subscriptions = stripe_customer.get("subscriptions")
+            if fetch_missing and (subscriptions is None or subscriptions["has_more"]):
+                subscriptions = list(
+                    stripe.Subscription.auto_paging_iter(customer=stripe_customer["id"])
+                )
+            else:
+                subscriptions = (subscriptions or {"data": []})["data"]
+
+            updates.append((customer, stripe_customer, stripe_source, subscriptions))
+
+        with transaction.atomic():
+            for customer, stripe_customer, _, _ in updates:
+                cls.sync_from_stripe_data(customer, stripe_customer)
+            StripeCard.sync_many(
+                [
+                    (customer, stripe_source)
+                    for customer, _, stripe_source, _ in updates
+                    if stripe_source is not None
+                ]
+            )
+            StripeSubscription.sync_many(
+                [
+                    (customer, subscription)
+                    for customer, _, _, subscriptions in updates
+                    for subscription in subscriptions
+                ]
+            )
+
+        return len(updates)
+
+    @classmethod
+    def get_stripe_customer_id(cls, kind, message):
+        """
+        Returns the stripe id of the customer referenced in a webhook event message
+        Args:
+            kind: the label of the event
+            message: the data of the event
+        """
+        if kind == "customer.created":
+            return None
 
         customer_crud_events = [
             "customer.updated",
             "customer.deleted",
         ]
-        event_data_object = event.message["data"]["object"]
-        if event.kind in customer_crud_events:
-            stripe_customer_id = event_data_object["id"]
-        else:
-            stripe_customer_id = event_data_object.get("customer", None)
+        event_data_object = message["data"]["object"]
+        if kind in customer_crud_events:
+            return event_data_object["id"]
+        return event_data_object.get("customer", None)
+
+    @classmethod
+    def get_for_events(cls, events):
+        """
+        Fetch the customers referenced in webhook event messages with a single query
+        Args:
+            events: the event objects
+        Returns:
+            dict of the customers by their stripe id
+        """
+        stripe_customer_ids = set()
+        for event in events:
+            stripe_customer_id = cls.get_stripe_customer_id(
+                event.kind, event.webhook_message
+            )
+            if stripe_customer_id is not None:
+                stripe_customer_ids.add(stripe_customer_id)
+
+        if not stripe_customer_ids:
+            return {}
+
+        customers = stripe_settings.CUSTOMER_MODEL.objects.filter(
+            stripe_id__in=stripe_customer_ids
+        )
+        return {customer.stripe_id: customer for customer in customers}
+
+    @classmethod
+    def link_customer(cls, event, customers=None, save=True):
+        """
+        Links a customer referenced in a webhook event message to the event object
+        Args:
+            event: the stripe_integrations.stripe.models.Event object to link
+            customers: optionally, dict of prefetched customers by their stripe id
+            save: whether to save the linked event object
+        """
+        stripe_customer_id = cls.get_stripe_customer_id(event.kind, event.message)
 
         if stripe_customer_id is not None:
-            try:
-                customer = stripe_settings.CUSTOMER_MODEL.objects.get(
+            if customers is not None:
+                customer = customers.get(stripe_customer_id)
+            else:
+                customer = stripe_settings.CUSTOMER_MODEL.objects.filter(
                     stripe_id=stripe_customer_id
-                )
-            except ObjectDoesNotExist:
+                ).first()
+
+            if customer is None:
                 raise Http404(
                     f"Stripe customer does not exist for event={event.stripe_id}"
                 )
 
             event.customer = customer
-            event.save()
+            if save:
+                event.save()
 
         return event
 
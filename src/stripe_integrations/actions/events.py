@@ -1,8 +1,38 @@
+# Standard Library
+import itertools
+import logging
+from datetime import timedelta
+
+# Third Party Stuff
+import stripe
+from django.core import serializers
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
 # Stripe Integrations Stuff
+from stripe_integrations.actions.customers import StripeCustomer
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import bulk_insert, hash_partition
 from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import chunked, iter_pages
+
+logger = logging.getLogger(__name__)
 
 
 class StripeEvent:
+    # Event processing modes
+    INLINE = "inline"  # process the event while handling the webhook request
+    QUEUE = "queue"  # store the event and process it with `process_stripe_events`
+
+    # Outcomes of added events
+    DUPLICATE = "duplicate"
+    QUEUED = "queued"
+    UNHANDLED = "unhandled"
+    PROCESSED = "processed"
+    INVALID = "invalid"
+    FAILED = "failed"
+
     @classmethod
     def add(
         cls,
@@ -23,8 +53,10 @@ class StripeEvent:
             message: the data of the webhook
             request_id: the id of the request that initiated the webhook
             pending_webhooks: the number of pending webhooks
+        Returns:
+            the event object, None if the event was already added
         """
-        event = stripe_settings.EVENT_MODEL.objects.create(
+        event = stripe_settings.EVENT_MODEL(
             stripe_id=stripe_id,
             kind=kind,
             livemode=livemode,
@@ -32,12 +64,503 @@ class StripeEvent:
             api_version=api_version,
             request=request,
             pending_webhooks=pending_webhooks,
+            target_id=cls.get_target_id(kind, message),
         )
 
+        # insert and deduplicate the event in a single statement
+        if not bulk_insert(stripe_settings.EVENT_MODEL, [event]):
+            return None
+
+        # queued events are processed later by the `process_stripe_events` command
+        if stripe_settings.EVENT_PROCESSING_MODE != cls.QUEUE:
+            cls.process(event)
+
+        return event
+
+    @classmethod
+    def add_many(cls, events_data, group_by_kind=True, reprocess=False):
+        """
+        Adds and processes a page of events, e.g. from `stripe.Event.list`
+        The events are inserted with a single statement, existing events are
+        skipped and the new events are processed in groups of the same kind
+        Args:
+            events_data: list of the data of the events
+            group_by_kind: when False, the events are processed in the given
+            order and only consecutive events of the same kind are grouped
+            reprocess: whether the existing events which are not processed,
+            e.g. because their processing failed, are processed again
+        Returns:
+            dict of the outcome of each event by its stripe id
+        """
+        outcomes = {}
+        events = []
+        for event_data in events_data:
+            if event_data["id"] in outcomes:
+                continue
+            outcomes[event_data["id"]] = cls.DUPLICATE
+            events.append(
+                stripe_settings.EVENT_MODEL(
+                    stripe_id=event_data["id"],
+                    kind=event_data["type"],
+                    livemode=event_data["livemode"],
+                    webhook_message=event_data,
+                    api_version=event_data["api_version"] or "",
+                    request=event_data["request"],
+                    pending_webhooks=event_data["pending_webhooks"],
+                    target_id=cls.get_target_id(event_data["type"], event_data),
+                )
+            )
+
+        inserted = bulk_insert(stripe_settings.EVENT_MODEL, events)
+
+        if stripe_settings.EVENT_PROCESSING_MODE == cls.QUEUE:
+            for event in inserted:
+                outcomes[event.stripe_id] = cls.QUEUED
+            return outcomes
+
+        if reprocess:
+            inserted = {event.stripe_id: event for event in inserted}
+            unprocessed = (
+                stripe_settings.EVENT_MODEL.objects.filter(
+                    stripe_id__in=[
+                        event.stripe_id
+                        for event in events
+                        if event.stripe_id not in inserted
+                    ],
+                    processed=False,
+                )
+                .exclude(valid=False)
+                .in_bulk(field_name="stripe_id")
+            )
+            events = [
+                inserted.get(event.stripe_id) or unprocessed[event.stripe_id]
+                for event in events
+                if event.stripe_id in inserted or event.stripe_id in unprocessed
+            ]
+        else:
+            events = inserted
+
         # Stripe Integrations Stuff
         from stripe_integrations.webhooks.base import registry
 
-        WebhookClass = registry.get(kind)
+        if group_by_kind:
+            events_by_kind = {}
+            for event in events:
+                events_by_kind.setdefault(event.kind, []).append(event)
+            groups = events_by_kind.items()
+        else:
+            groups = (
+                (kind, list(kind_events))
+                for kind, kind_events in itertools.groupby(
+                    events, key=lambda event: event.kind
+                )
+            )
+
+        for kind, kind_events in groups:
+            WebhookClass = registry.get(kind)
+            if WebhookClass is None:
+                for event in kind_events:
+                    outcomes[event.stripe_id] = cls.UNHANDLED
+                continue
+
+            errors = WebhookClass.process_many(kind_events)
+            for event in kind_events:
+                if event.stripe_id in errors:
+                    logger.error(
+                        "Error occurred while processing stripe event, "
+                        "event_id=%s, error=%s",
+                        event.stripe_id,
+                        errors[event.stripe_id],
+                    )
+                    outcomes[event.stripe_id] = cls.FAILED
+                elif event.processed:
+                    outcomes[event.stripe_id] = cls.PROCESSED
+                else:
+                    outcomes[event.stripe_id] = cls.INVALID
+
+        return outcomes
+
+    @classmethod
+    def replay(cls, since=None):
+        """
+        Adds and processes the events that are missing in the local database,
+        e.g. after the webhook endpoint was unreachable for longer than stripe
+        retries its deliveries. Stripe lists the events of the last 30 days.
+        Events whose processing failed are processed again, and the checkpoint
+        stops at the oldest of them, so the next replay retries it
+        Args:
+            since: replay the events created since this unix timestamp,
+            defaults to the checkpoint of the previous replay
+        Returns:
+            dict of the outcome of each missing event by its stripe id
+        """
+        state = StripeSyncState.get("events")
+        if since is None and state is not None:
+            since = state.last_created
+
+        params = {"limit": 100}
+        if since is not None:
+            params["created"] = {"gte": since}
+
+        missing = []
+        last_created = since
+        for page in iter_pages(stripe.Event.list, **params):
+            stored = stripe_settings.EVENT_MODEL.objects.filter(
+                stripe_id__in=[event_data["id"] for event_data in page["data"]]
+            )
+            if stripe_settings.EVENT_PROCESSING_MODE != cls.QUEUE:
+                # events whose processing failed are processed again
+                stored = stored.filter(Q(processed=True) | Q(valid=False))
+            existing = set(stored.values_list("stripe_id", flat=True))
+            for event_data in page["data"]:
+                if event_data["id"] not in existing:
+                    missing.append(event_data)
+                if last_created is None or event_data["created"] > last_created:
+                    last_created = event_data["created"]
+
+        # stripe lists the newest events first
+        missing.reverse()
+        outcomes = {}
+        for events_data in chunked(missing, 100):
+            outcomes.update(
+                cls.add_many(events_data, group_by_kind=False, reprocess=True)
+            )
+
+        failed = [
+            event_data["created"]
+            for event_data in missing
+            if outcomes.get(event_data["id"]) == cls.FAILED
+        ]
+        if failed:
+            # the events are listed from `created`, included, by the next replay
+            last_created = min(failed)
+
+        if state is not None and last_created is not None:
+            state.last_created = last_created
+            state.save()
+
+        return outcomes
+
+    @classmethod
+    def get_target_id(cls, kind, message):
+        """
+        Returns the stripe id of the customer, or else the object, an event applies to
+        Args:
+            kind: the label of the event
+            message: the data of the event
+        """
+        return StripeCustomer.get_stripe_customer_id(kind, message) or message["data"][
+            "object"
+        ].get("id", "")
+
+    @classmethod
+    def process(cls, event, superseded=None):
+        """
+        Processes an event with the webhook class registered for its kind
+        Args:
+            event: the event object to process
+            superseded: optionally, older events of the same object or customer
+            that are coalesced into this event
+        """
+        # Stripe Integrations Stuff
+        from stripe_integrations.webhooks.base import registry
+
+        WebhookClass = registry.get(event.kind)
         if WebhookClass is not None:
             webhook = WebhookClass(event)
-            webhook.process()
+            if superseded:
+                webhook.process_coalesced(superseded)
+            else:
+                webhook.process()
+
+    @classmethod
+    def get_coalesce_key(cls, event):
+        """
+        Returns the kind and the object or customer targeted by an event, if
+        the webhook class of its kind allows coalescing. Only events of the
+        same kind are coalesced, so that the signal of every kind is sent
+        """
+        # Stripe Integrations Stuff
+        from stripe_integrations.webhooks.base import BaseWebhook, registry
+
+        coalesce_by = getattr(registry.get(event.kind), "coalesce_by", None)
+        if coalesce_by == BaseWebhook.COALESCE_OBJECT:
+            return event.kind, event.webhook_message["data"]["object"]["id"]
+        if coalesce_by == BaseWebhook.COALESCE_CUSTOMER:
+            stripe_customer_id = StripeCustomer.get_stripe_customer_id(
+                event.kind, event.webhook_message
+            )
+            if stripe_customer_id is not None:
+                return event.kind, stripe_customer_id
+        return None
+
+    @classmethod
+    def coalesce(cls, events):
+        """
+        Groups the events of the same kind and object or customer that were
+        created within `EVENT_COALESCE_WINDOW` seconds of each other
+        Args:
+            events: the event objects, oldest first
+        Returns:
+            list of event groups, the newest event of a group is the last one
+        """
+        window = stripe_settings.EVENT_COALESCE_WINDOW
+        if not window:
+            return [[event] for event in events]
+
+        groups = []
+        open_groups = {}
+        for event in events:
+            key = cls.get_coalesce_key(event)
+            group = open_groups.get(key)
+            if (
+                group is not None
+                and event.webhook_message["created"]
+                - group[0].webhook_message["created"]
+                <= window
+            ):
+                group.append(event)
+                continue
+
+            group = [event]
+            groups.append(group)
+            if key is not None:
+                open_groups[key] = group
+
+        position = {event.pk: index for index, event in enumerate(events)}
+        for group in groups:
+            # stripe doesn't guarantee the delivery order of events
+            group.sort(key=lambda event: event.webhook_message["created"])
+        # process each group in place of its newest event
+        groups.sort(key=lambda group: max(position[event.pk] for event in group))
+        return groups
+
+    @classmethod
+    def get_events(cls, kind=None, customer=None):
+        """
+        Returns the queryset of events, newest first
+        Args:
+            kind: optionally, only return the events of this kind
+            customer: optionally, only return the events linked to this customer
+        """
+        events = stripe_settings.EVENT_MODEL.objects.all()
+        if kind is not None:
+            events = events.filter(kind=kind)
+        if customer is not None:
+            events = events.filter(customer=customer)
+        return events.order_by("-created_at")
+
+    @classmethod
+    def get_pending(cls, partition=None, partitions=1):
+        """
+        Returns the queryset of events waiting to be processed, oldest first
+        Args:
+            partition: optionally, only return the events of this partition
+            partitions: the number of partitions the events are hashed into
+            by their `target_id`, so all events of a customer share a partition
+        Failed events are pending again once their `next_attempt_at` has
+        passed, see `get_retry_delay`.
+        Events are kept in order per `target_id`: the events of a customer are
+        not pending while an older event of the customer is being retried, is
+        claimed by another worker, or was given up on, until it is requeued
+        """
+        now = timezone.now()
+        # events claimed by a worker that didn't finish them are claimed again
+        claim_expired = now - timedelta(seconds=stripe_settings.EVENT_CLAIM_TIMEOUT)
+        unprocessed = stripe_settings.EVENT_MODEL.objects.filter(
+            processed=False
+        ).exclude(valid=False)
+        # abandoned events block their target too, so that newer events are
+        # never applied on top of a lost one
+        blocking = (
+            unprocessed.filter(
+                target_id=OuterRef("target_id"),
+                created_at__lt=OuterRef("created_at"),
+            )
+            .exclude(target_id="")
+            .filter(Q(failed_attempts__gt=0) | Q(claimed_at__gte=claim_expired))
+        )
+        events = unprocessed.filter(
+            Q(claimed_at__isnull=True) | Q(claimed_at__lt=claim_expired),
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            ~Exists(blocking),
+            failed_attempts__lt=stripe_settings.EVENT_MAX_ATTEMPTS,
+        )
+
+        if partition is not None:
+            events = events.annotate(
+                partition=hash_partition("target_id", partitions)
+            ).filter(partition=partition)
+
+        return events.order_by("created_at")
+
+    @classmethod
+    def claim_pending(cls, batch_size=100, partition=None, partitions=1):
+        """
+        Claims a batch of pending events, in a short transaction
+        The claimed events are skipped by concurrent workers until they are
+        processed, or until `EVENT_CLAIM_TIMEOUT` seconds have passed
+        Args:
+            batch_size: the maximum number of events to claim
+            partition: optionally, only claim the events of this partition
+            partitions: the number of partitions, see `get_pending`
+        Returns:
+            list of the claimed event objects, oldest first
+        """
+        with transaction.atomic():
+            events = list(
+                cls.get_pending(partition, partitions).select_for_update(
+                    skip_locked=True
+                )[:batch_size]
+            )
+            claimed_at = timezone.now()
+            stripe_settings.EVENT_MODEL.objects.filter(
+                pk__in=[event.pk for event in events]
+            ).update(claimed_at=claimed_at)
+        for event in events:
+            event.claimed_at = claimed_at
+        return events
+
+    @classmethod
+    def get_retry_delay(cls, failed_attempts):
+        """
+        Returns the number of seconds before a failed event is retried, it
+        doubles with each failed attempt from `EVENT_RETRY_BACKOFF` up to
+        `EVENT_RETRY_BACKOFF_MAX`, so a short outage doesn't use up the
+        `EVENT_MAX_ATTEMPTS` attempts of an event
+        Args:
+            failed_attempts: the number of times processing the event has failed
+        """
+        return min(
+            stripe_settings.EVENT_RETRY_BACKOFF * 2 ** (failed_attempts - 1),
+            stripe_settings.EVENT_RETRY_BACKOFF_MAX,
+        )
+
+    @classmethod
+    def get_abandoned(cls):
+        """
+        Returns the queryset of events given up on after failing
+        `EVENT_MAX_ATTEMPTS` times, oldest first
+        """
+        return (
+            stripe_settings.EVENT_MODEL.objects.filter(
+                processed=False,
+                failed_attempts__gte=stripe_settings.EVENT_MAX_ATTEMPTS,
+            )
+            .exclude(valid=False)
+            .order_by("created_at")
+        )
+
+    @classmethod
+    def requeue(cls, events=None):
+        """
+        Makes events that were given up on pending again, with all their attempts
+        Args:
+            events: optionally, the queryset of events to requeue, defaults to
+            all the abandoned events, see `get_abandoned`
+        Returns:
+            the number of events requeued
+        """
+        if events is None:
+            events = cls.get_abandoned()
+        return events.filter(processed=False).update(
+            failed_attempts=0, next_attempt_at=None, claimed_at=None
+        )
+
+    @classmethod
+    def process_pending(cls, batch_size=100, partition=None, partitions=1):
+        """
+        Processes a batch of pending events
+        The events are claimed first, see `claim_pending`, then each group of
+        coalesced events is processed in its own transaction, see `coalesce`.
+        Failed events are retried later, see `get_retry_delay`.
+        Events of kinds without a webhook class are marked processed
+        Args:
+            batch_size: the maximum number of events to process
+            partition: optionally, only process the events of this partition
+            partitions: the number of partitions, see `get_pending`
+        Returns:
+            the number of events claimed
+        """
+        # Stripe Integrations Stuff
+        from stripe_integrations.webhooks.base import registry
+
+        events = cls.claim_pending(batch_size, partition, partitions)
+        unhandled = [event for event in events if registry.get(event.kind) is None]
+        stripe_settings.EVENT_MODEL.objects.filter(
+            pk__in=[event.pk for event in unhandled]
+        ).update(processed=True, claimed_at=None)
+
+        handled = [event for event in events if registry.get(event.kind) is not None]
+        failed_targets = set()
+        for group in cls.coalesce(handled):
+            targets = {event.target_id for event in group if event.target_id}
+            if targets & failed_targets:
+                # keep the newer events of a failed target for after its retry
+                continue
+
+            event = group[-1]
+            try:
+                with transaction.atomic():
+                    cls.process(event, superseded=group[:-1])
+            except Exception:
+                logger.exception(
+                    "Error occurred while processing stripe event, event_id=%s",
+                    event.stripe_id,
+                )
+                failed_attempts = max(event.failed_attempts for event in group) + 1
+                stripe_settings.EVENT_MODEL.objects.filter(
+                    pk__in=[event.pk for event in group]
+                ).update(
+                    failed_attempts=F("failed_attempts") + 1,
+                    next_attempt_at=timezone.now()
+                    + timedelta(seconds=cls.get_retry_delay(failed_attempts)),
+                )
+                failed_targets.update(targets)
+                if failed_attempts >= stripe_settings.EVENT_MAX_ATTEMPTS:
+                    logger.error(
+                        "Gave up on stripe event after %s failed attempts, "
+                        "event_id=%s, the newer events of %s are held back until "
+                        "it is requeued with `requeue_stripe_events`",
+                        failed_attempts,
+                        event.stripe_id,
+                        event.target_id,
+                    )
+
+        stripe_settings.EVENT_MODEL.objects.filter(
+            pk__in=[event.pk for event in handled]
+        ).update(claimed_at=None)
+        return len(events)
+
+    @classmethod
+    def purge(cls, days, batch_size=1000, archive=None):
+        """
+        Deletes the processed and invalid events older than the given number
+        of days, in batches so that each delete stays short
+        Args:
+            days: the number of days events are kept for
+            batch_size: the number of events deleted at a time
+            archive: optionally, a text file the events are written to as
+            JSON lines before they are deleted, it can be loaded with `loaddata`
+        Returns:
+            the number of events deleted
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+        events = stripe_settings.EVENT_MODEL.objects.filter(
+            Q(processed=True) | Q(valid=False), created_at__lt=cutoff
+        ).order_by("created_at")
+
+        deleted = 0
+        while True:
+            if archive is not None:
+                batch = list(events[:batch_size])
+                serializers.serialize("jsonl", batch, stream=archive)
+                pks = [event.pk for event in batch]
+            else:
+                pks = list(events.values_list("pk", flat=True)[:batch_size])
+
+            if not pks:
+                return deleted
+
+            stripe_settings.EVENT_MODEL.objects.filter(pk__in=pks).delete()
+            deleted += len(pks)
@@ -4,42 +4,167 @@ from django.utils import timezone
 
 # Stripe Integrations Stuff
 from stripe_integrations.actions.products import StripeProduct
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import bulk_upsert_changed, record_writes, update_or_create
 from stripe_integrations.settings import stripe_settings
 
 
 class StripePrice:
     @classmethod
-    def sync_all(cls):
+    def sync_all(cls, concurrency=1, incremental=False, shard=None):
         """
         Synchronizes all prices from the Stripe API
+        Args:
+            concurrency: the number of pages of prices synced at the same time
+            incremental: only sync the prices changed since the previous sync,
+            when its checkpoint allows it
+            shard: optionally, only sync the prices of this shard. The deleted
+            prices are soft deleted once every shard is synced
         """
-        prices = stripe.Price.auto_paging_iter()
-        synced_price_ids = []
-        for price in prices:
-            price_obj, _ = cls.sync(price)
-            synced_price_ids.append(price_obj.id)
+        if incremental:
+            changed = StripeSyncState.sync_changes(
+                "prices",
+                ["price.created", "price.updated", "price.deleted"],
+                cls.sync_from_event,
+                shard=shard,
+            )
+            if changed is not None:
+                return
+
+        _, generations = StripeSyncState.sync_list(
+            "prices",
+            stripe.Price.list,
+            cls.sync_many,
+            concurrency=concurrency,
+            shard=shard,
+            limit=100,
+            expand=["data.product"],
+        )
 
         # sync deleted prices
-        stripe_settings.PRICE_MODEL.objects.exclude(id__in=synced_price_ids).update(
-            date_purged=timezone.now()
+        if generations:
+            StripeSyncState.sweep(stripe_settings.PRICE_MODEL, generations)
+
+    @classmethod
+    def sync_many(cls, prices, generation=None, fetch_missing=True):
+        """
+        Synchronizes a list of prices from the Stripe API, written in batches of
+        SYNC_BATCH_SIZE prices
+        The products of the prices are looked up with a single query, and the
+        missing ones are synced in bulk, from the expanded product of the price
+        when available
+        Args:
+            prices: data from Stripe API representing the prices
+            generation: optionally, the generation of the full sync which
+            found the prices
+            fetch_missing: whether to retrieve the missing products which are
+            not expanded, otherwise their prices are skipped
+        Returns:
+            list of the price objects
+        """
+        if not fetch_missing:
+            prices = cls.skip_unknown_products(prices)
+        if not prices:
+            return []
+
+        product_ids = {cls.get_product_id(price) for price in prices}
+        stripe_products = {
+            price["product"]["id"]: price["product"]
+            for price in prices
+            if not isinstance(price["product"], str)
+        }
+
+        product_pks = dict(
+            stripe_settings.PRODUCT_MODEL.objects.filter(
+                stripe_id__in=product_ids
+            ).values_list("stripe_id", "pk")
+        )
+        missing_products = [
+            stripe_products.get(product_id) or stripe.Product.retrieve(product_id)
+            for product_id in product_ids
+            if product_id not in product_pks
+        ]
+        for product in StripeProduct.sync_many(missing_products):
+            product_pks[product.stripe_id] = product.pk
+
+        sync_fields = {} if generation is None else {"sync_generation": generation}
+        price_objs = []
+        for price in prices:
+            price_obj = stripe_settings.PRICE_MODEL(
+                stripe_id=price["id"], **cls.get_defaults(price, None), **sync_fields
+            )
+            price_obj.product_id = product_pks[cls.get_product_id(price)]
+            price_objs.append(price_obj)
+        return bulk_upsert_changed(
+            stripe_settings.PRICE_MODEL,
+            price_objs,
+            update_fields=cls.get_defaults(prices[0], None).keys(),
+            batch_size=stripe_settings.SYNC_BATCH_SIZE,
+            touch=sync_fields,
         )
 
     @classmethod
-    def sync(cls, price):
+    def skip_unknown_products(cls, prices):
         """
-        Synchronizes a price from the Stripe API
+        Returns the prices whose product is expanded or exists locally, the
+        other prices are counted as skipped
         Args:
-            price: data from Stripe API representing a price
+            prices: data from Stripe API representing the prices
         """
+        product_ids = {
+            cls.get_product_id(price)
+            for price in prices
+            if isinstance(price["product"], str)
+        }
+        local_ids = set(
+            stripe_settings.PRODUCT_MODEL.objects.filter(
+                stripe_id__in=product_ids
+            ).values_list("stripe_id", flat=True)
+        )
+        known = [
+            price
+            for price in prices
+            if not isinstance(price["product"], str) or price["product"] in local_ids
+        ]
+        record_writes(skipped=len(prices) - len(known))
+        return known
 
-        product = stripe_settings.PRODUCT_MODEL.objects.filter(
-            stripe_id=price["product"]
-        ).first()
-        if not product:
-            stripe_product = stripe.Product.retrieve(price["product"])
-            product, _ = StripeProduct.sync(stripe_product)
+    @classmethod
+    def get_product_id(cls, price):
+        """
+        Returns the Stripe ID of the product of a price
+        Args:
+            price: data from Stripe API representing a price, with or without
+            its product expanded
+        """
+        if isinstance(price["product"], str):
+            return price["product"]
+        return price["product"]["id"]
+
+    @classmethod
+    def sync_from_event(cls, event_data):
+        """
+        Synchronizes a price from an event of its change
+        Args:
+            event_data: data from Stripe API representing the event
+        Returns:
+            the price object, None if it was deleted
+        """
+        price = event_data["data"]["object"]
+        if event_data["type"] == "price.deleted":
+            cls.soft_delete(price["id"])
+            return None
+        return cls.sync(price)[0]
 
-        defaults = {
+    @classmethod
+    def get_defaults(cls, price, product):
+        """
+        Returns the field values of a price from the Stripe API
+        Args:
+            price: data from Stripe API representing a price
+            product: the product object of the price
+        """
+        return {
             "active": price["active"],
             "currency": price["currency"],
             "metadata": price["metadata"],
@@ -60,8 +185,27 @@ class StripePrice:
             "product": product,
         }
 
-        price, is_created = stripe_settings.PRICE_MODEL.objects.update_or_create(
-            stripe_id=price["id"], defaults=defaults
+    @classmethod
+    def sync(cls, price):
+        """
+        Synchronizes a price from the Stripe API
+        Args:
+            price: data from Stripe API representing a price
+        """
+
+        product = stripe_settings.PRODUCT_MODEL.objects.filter(
+            stripe_id=cls.get_product_id(price)
+        ).first()
+        if not product:
+            if isinstance(price["product"], str):
+                stripe_product = stripe.Product.retrieve(price["product"])
+            else:
+                stripe_product = price["product"]
+            product, _ = StripeProduct.sync(stripe_product)
+
+        defaults = cls.get_defaults(price, product)
+        price, is_created = update_or_create(
+            stripe_settings.PRICE_MODEL, stripe_id=price["id"], defaults=defaults
         )
         return price, is_created
 
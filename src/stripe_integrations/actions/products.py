@@ -3,34 +3,99 @@ import stripe
 from django.utils import timezone
 
 # Stripe Integrations Stuff
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import bulk_upsert_changed, update_or_create
 from stripe_integrations.settings import stripe_settings
 
 
 class StripeProduct:
     @classmethod
-    def sync_all(cls):
+    def sync_all(cls, concurrency=1, incremental=False, shard=None):
         """
         Synchronizes all products from the Stripe API
+        Args:
+            concurrency: the number of pages of products synced at the same time
+            incremental: only sync the products changed since the previous sync,
+            when its checkpoint allows it
+            shard: optionally, only sync the products of this shard. The deleted
+            products are soft deleted once every shard is synced
         """
-        products = stripe.Product.auto_paging_iter()
-        synced_product_ids = []
-        for product in products:
-            product_obj, _ = cls.sync(product)
-            synced_product_ids.append(product_obj.id)
+        if incremental:
+            changed = StripeSyncState.sync_changes(
+                "products",
+                ["product.created", "product.updated", "product.deleted"],
+                cls.sync_from_event,
+                shard=shard,
+            )
+            if changed is not None:
+                return
+
+        _, generations = StripeSyncState.sync_list(
+            "products",
+            stripe.Product.list,
+            cls.sync_many,
+            concurrency=concurrency,
+            shard=shard,
+            limit=100,
+        )
 
         # sync deleted products
-        stripe_settings.PRODUCT_MODEL.objects.exclude(id__in=synced_product_ids).update(
-            date_purged=timezone.now()
+        if generations:
+            StripeSyncState.sweep(stripe_settings.PRODUCT_MODEL, generations)
+
+    @classmethod
+    def sync_many(cls, products, generation=None):
+        """
+        Synchronizes a list of products from the Stripe API, written in
+        batches of SYNC_BATCH_SIZE products
+        Args:
+            products: data from Stripe API representing the products
+            generation: optionally, the generation of the full sync which
+            found the products
+        Returns:
+            list of the product objects
+        """
+        if not products:
+            return []
+
+        sync_fields = {} if generation is None else {"sync_generation": generation}
+        product_objs = [
+            stripe_settings.PRODUCT_MODEL(
+                stripe_id=product["id"], **cls.get_defaults(product), **sync_fields
+            )
+            for product in products
+        ]
+        return bulk_upsert_changed(
+            stripe_settings.PRODUCT_MODEL,
+            product_objs,
+            update_fields=cls.get_defaults(products[0]).keys(),
+            batch_size=stripe_settings.SYNC_BATCH_SIZE,
+            touch=sync_fields,
         )
 
     @classmethod
-    def sync(cls, product):
+    def sync_from_event(cls, event_data):
         """
-        Synchronizes a product from the Stripe API
+        Synchronizes a product from an event of its change
+        Args:
+            event_data: data from Stripe API representing the event
+        Returns:
+            the product object, None if it was deleted
+        """
+        product = event_data["data"]["object"]
+        if event_data["type"] == "product.deleted":
+            cls.soft_delete(product["id"])
+            return None
+        return cls.sync(product)[0]
+
+    @classmethod
+    def get_defaults(cls, product):
+        """
+        Returns the field values of a product from the Stripe API
         Args:
             product: data from Stripe API representing a product
         """
-        defaults = {
+        return {
             "active": product["active"],
             "description": product["description"],
             "metadata": product["metadata"],
@@ -47,8 +112,16 @@ class StripeProduct:
             "updated": product["updated"],
         }
 
-        product, is_created = stripe_settings.PRODUCT_MODEL.objects.update_or_create(
-            stripe_id=product["id"], defaults=defaults
+    @classmethod
+    def sync(cls, product):
+        """
+        Synchronizes a product from the Stripe API
+        Args:
+            product: data from Stripe API representing a product
+        """
+        defaults = cls.get_defaults(product)
+        product, is_created = update_or_create(
+            stripe_settings.PRODUCT_MODEL, stripe_id=product["id"], defaults=defaults
         )
         return product, is_created
 
@@ -0,0 +1,98 @@
+# Standard Library
+import json
+
+# Third Party Stuff
+import stripe
+from stripe.util import convert_to_stripe_object
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions.coupons import StripeCoupon
+from stripe_integrations.actions.customers import StripeCustomer
+from stripe_integrations.actions.prices import StripePrice
+from stripe_integrations.actions.products import StripeProduct
+from stripe_integrations.actions.subscriptions import StripeSubscription
+from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import chunked, iter_pages
+
+
+class StripeSnapshot:
+    # In the order they are loaded, e.g. prices after their products
+    RESOURCES = ("products", "prices", "coupons", "customers", "subscriptions")
+
+    @classmethod
+    def get_filename(cls, resource):
+        """
+        Returns the name of the snapshot file of a resource
+        Args:
+            resource: name of the resource, one of RESOURCES
+        """
+        return "{}.ndjson.gz".format(resource)
+
+    @classmethod
+    def get_list_request(cls, resource):
+        """
+        Returns the list method of a resource and the parameters listing the
+        objects with everything needed to load them
+        Args:
+            resource: name of the resource, one of RESOURCES
+        """
+        return {
+            "products": (stripe.Product.list, {}),
+            "prices": (stripe.Price.list, {"expand": ["data.product"]}),
+            "coupons": (stripe.Coupon.list, {"expand": ["data.applies_to"]}),
+            "customers": (stripe.Customer.list, {"expand": ["data.sources"]}),
+            "subscriptions": (stripe.Subscription.list, {"status": "all"}),
+        }[resource]
+
+    @classmethod
+    def export(cls, resource, file):
+        """
+        Writes every object of a resource listed from the Stripe API to a file,
+        as JSON lines, a page at a time
+        Args:
+            resource: name of the resource, one of RESOURCES
+            file: the text file the objects are written to
+        Returns:
+            the number of objects written
+        """
+        list_method, params = cls.get_list_request(resource)
+        count = 0
+        for page in iter_pages(list_method, limit=100, **params):
+            for stripe_object in page["data"]:
+                file.write(json.dumps(stripe_object, sort_keys=True))
+                file.write("\n")
+                count += 1
+        return count
+
+    @classmethod
+    def load(cls, resource, file):
+        """
+        Synchronizes the objects of a resource from a file written by export,
+        in batches of SYNC_BATCH_SIZE objects and without requests to the
+        Stripe API. Customers and subscriptions only update the existing local
+        customers, prices are only loaded with their product, and the other
+        objects are counted as skipped
+        Args:
+            resource: name of the resource, one of RESOURCES
+            file: the text file the objects are read from
+        Returns:
+            the number of objects read
+        """
+        sync_many = {
+            "products": StripeProduct.sync_many,
+            "prices": lambda prices: StripePrice.sync_many(prices, fetch_missing=False),
+            "coupons": StripeCoupon.sync_many,
+            "customers": lambda stripe_customers: StripeCustomer.sync_many(
+                stripe_customers, fetch_missing=False
+            ),
+            "subscriptions": StripeSubscription.sync_many_from_stripe_data,
+        }[resource]
+
+        stripe_objects = (
+            convert_to_stripe_object(json.loads(line)) for line in file if line.strip()
+        )
+        count = 0
+        for batch in chunked(stripe_objects, stripe_settings.SYNC_BATCH_SIZE):
+            sync_many(batch)
+            count += len(batch)
+        return count
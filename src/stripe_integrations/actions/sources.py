@@ -3,6 +3,7 @@ import stripe
 
 # Stripe Integrations Stuff
 from stripe_integrations.actions.customers import StripeCustomer
+from stripe_integrations.db import bulk_upsert_changed, update_or_create
 from stripe_integrations.settings import stripe_settings
 
 
@@ -40,7 +41,9 @@ class StripeCard:
         stripe.Customer.delete_source(customer.stripe_id, source_stripe_id)
 
         # sync customer from stripe to update default source
-        StripeCustomer.sync(customer)
+        StripeCustomer.sync(
+            customer, scope=(StripeCustomer.SYNC_CUSTOMER, StripeCustomer.SYNC_CARDS)
+        )
 
         return cls.delete(source_stripe_id)
 
@@ -57,12 +60,12 @@ class StripeCard:
             return cls.sync(customer, source)
 
     @classmethod
-    def sync(cls, customer, source=None):
+    def get_defaults(cls, customer, source):
         """
-        Synchronizes the data for a card locally for a given customer
+        Returns the field values of a card of a given customer
 
         Args:
-            customer: the customer to create or update a card for
+            customer: the customer of the card
             source: data representing the card from the Stripe API
         """
         defaults = dict(
@@ -87,12 +90,56 @@ class StripeCard:
             fingerprint=source["fingerprint"],
         )
         defaults.update({stripe_settings.CUSTOMER_FIELD_NAME: customer})
+        return defaults
 
-        card, _ = stripe_settings.CARD_MODEL.objects.update_or_create(
-            stripe_id=source["id"], defaults=defaults
+    @classmethod
+    def sync(cls, customer, source=None):
+        """
+        Synchronizes the data for a card locally for a given customer
+
+        Args:
+            customer: the customer to create or update a card for
+            source: data representing the card from the Stripe API
+        """
+        defaults = cls.get_defaults(customer, source)
+        card, _ = update_or_create(
+            stripe_settings.CARD_MODEL, stripe_id=source["id"], defaults=defaults
         )
         return card
 
+    @classmethod
+    def sync_many(cls, sources):
+        """
+        Synchronizes the cards among payment sources locally, written in
+        batches of SYNC_BATCH_SIZE cards
+
+        Args:
+            sources: list of (customer, source) pairs, where source is data
+            representing the payment source from the Stripe API
+        Returns:
+            list of the card objects
+        """
+        sources = [
+            (customer, source)
+            for customer, source in sources
+            if source["object"] == "card"
+        ]
+        if not sources:
+            return []
+
+        cards = [
+            stripe_settings.CARD_MODEL(
+                stripe_id=source["id"], **cls.get_defaults(customer, source)
+            )
+            for customer, source in sources
+        ]
+        return bulk_upsert_changed(
+            stripe_settings.CARD_MODEL,
+            cards,
+            update_fields=cls.get_defaults(*sources[0]).keys(),
+            batch_size=stripe_settings.SYNC_BATCH_SIZE,
+        )
+
     @classmethod
     def delete(cls, stripe_id):
         """
@@ -6,6 +6,8 @@ from django.utils import timezone
 # Stripe Integrations Stuff
 from stripe_integrations import utils
 from stripe_integrations.actions.customers import StripeCustomer
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import bulk_upsert_changed, record_writes, update_or_create
 from stripe_integrations.settings import stripe_settings
 
 
@@ -92,15 +94,13 @@ class StripeSubscription:
         )
 
     @classmethod
-    def sync_from_stripe_data(cls, customer, stripe_subscription):
+    def get_defaults(cls, customer, stripe_subscription):
         """
-        Synchronizes data from the Stripe API for a subscription
+        Returns the field values of a subscription of a given customer
         Args:
-            customer: the customer who's subscription we are syncronizing
+            customer: the customer of the subscription
             stripe_subscription: data from the Stripe API representing
             a subscription
-        Returns:
-            the stripe_integrations.models.Subscription object (created or updated)
         """
         defaults = dict(
             items=stripe_subscription["items"],
@@ -144,12 +144,137 @@ class StripeSubscription:
             latest_invoice=stripe_subscription["latest_invoice"] or "",
         )
         defaults.update({stripe_settings.CUSTOMER_FIELD_NAME: customer})
+        return defaults
 
-        subscription, _ = stripe_settings.SUBSCRIPTION_MODEL.objects.update_or_create(
-            stripe_id=stripe_subscription["id"], defaults=defaults
+    @classmethod
+    def sync_from_stripe_data(cls, customer, stripe_subscription):
+        """
+        Synchronizes data from the Stripe API for a subscription
+        Args:
+            customer: the customer who's subscription we are syncronizing
+            stripe_subscription: data from the Stripe API representing
+            a subscription
+        Returns:
+            the stripe_integrations.models.Subscription object (created or updated)
+        """
+        defaults = cls.get_defaults(customer, stripe_subscription)
+        subscription, _ = update_or_create(
+            stripe_settings.SUBSCRIPTION_MODEL,
+            stripe_id=stripe_subscription["id"],
+            defaults=defaults,
         )
         return subscription
 
+    @classmethod
+    def sync_many(cls, subscriptions):
+        """
+        Synchronizes data from the Stripe API for a list of subscriptions,
+        written in batches of SYNC_BATCH_SIZE subscriptions
+        Args:
+            subscriptions: list of (customer, stripe_subscription) pairs, where
+            stripe_subscription is data from the Stripe API representing
+            a subscription
+        Returns:
+            list of the subscription objects
+        """
+        if not subscriptions:
+            return []
+
+        subscription_objs = [
+            stripe_settings.SUBSCRIPTION_MODEL(
+                stripe_id=stripe_subscription["id"],
+                **cls.get_defaults(customer, stripe_subscription),
+            )
+            for customer, stripe_subscription in subscriptions
+        ]
+        return bulk_upsert_changed(
+            stripe_settings.SUBSCRIPTION_MODEL,
+            subscription_objs,
+            update_fields=cls.get_defaults(*subscriptions[0]).keys(),
+            batch_size=stripe_settings.SYNC_BATCH_SIZE,
+        )
+
+    @classmethod
+    def sync_all(
+        cls, status="all", created_after=None, concurrency=1, page_size=100, shard=None
+    ):
+        """
+        Synchronizes the subscriptions of the local customers from the Stripe
+        API, listed a page at a time across every customer, and the sync
+        resumes from its checkpoint
+        Args:
+            status: the status of the subscriptions to sync, defaults to all of
+            them, including the canceled ones
+            created_after: optionally, only sync the subscriptions created after
+            this unix timestamp
+            concurrency: the number of pages of subscriptions synced at the same time
+            page_size: the number of subscriptions requested per page
+            shard: optionally, only sync the subscriptions of this shard, with
+            its own checkpoint. Every shard still lists all the subscriptions
+        Returns:
+            the number of subscriptions synced
+        """
+        # syncs of different subscriptions have their own checkpoints
+        resource = "subscriptions"
+        params = {"status": status, "limit": page_size}
+        if status != "all":
+            resource += ":status={}".format(status)
+        if created_after is not None:
+            resource += ":created_after={}".format(created_after)
+            params["created"] = {"gt": created_after}
+
+        results, _ = StripeSyncState.sync_list(
+            resource,
+            stripe.Subscription.list,
+            lambda subscriptions, generation: cls.sync_many_from_stripe_data(
+                subscriptions
+            ),
+            concurrency=concurrency,
+            shard=shard,
+            **params,
+        )
+        return sum(len(subscriptions) for subscriptions in results)
+
+    @classmethod
+    def sync_many_from_stripe_data(cls, stripe_subscriptions):
+        """
+        Synchronizes a list of subscriptions from the Stripe API, their local
+        customers are looked up with a single query. Subscriptions of customers
+        without an active local customer are skipped
+        Args:
+            stripe_subscriptions: data from the Stripe API representing the
+            subscriptions
+        Returns:
+            list of the subscription objects
+        """
+        customer_ids = {
+            cls.get_customer_id(stripe_subscription)
+            for stripe_subscription in stripe_subscriptions
+        }
+        customers = stripe_settings.CUSTOMER_MODEL.objects.filter(
+            is_active=True
+        ).in_bulk(customer_ids, field_name="stripe_id")
+
+        subscriptions = []
+        for stripe_subscription in stripe_subscriptions:
+            customer = customers.get(cls.get_customer_id(stripe_subscription))
+            if customer is not None:
+                subscriptions.append((customer, stripe_subscription))
+        record_writes(skipped=len(stripe_subscriptions) - len(subscriptions))
+        return cls.sync_many(subscriptions)
+
+    @classmethod
+    def get_customer_id(cls, stripe_subscription):
+        """
+        Returns the Stripe ID of the customer of a subscription
+        Args:
+            stripe_subscription: data from the Stripe API representing a
+            subscription, with or without its customer expanded
+        """
+        if isinstance(stripe_subscription["customer"], str):
+            return stripe_subscription["customer"]
+        return stripe_subscription["customer"]["id"]
+
     @classmethod
     def has_active_subscription(cls, customer):
         """
@@ -0,0 +1,262 @@
+# Standard Library
+import logging
+import threading
+import time
+
+# Third Party Stuff
+import stripe
+from django.utils import timezone
+
+# Stripe Integrations Stuff
+from stripe_integrations.concurrency import WorkerPool
+from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import Shard, convert_tstamp, iter_pages
+
+logger = logging.getLogger(__name__)
+
+
+class SyncCheckpoint:
+    """
+    Saves the cursor of a sync once the pages up to it are synced, which can
+    complete out of order when they are synced concurrently
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self._cursors = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def done(self, index, cursor):
+        """
+        Marks a page as synced
+        Args:
+            index: the position of the page in the sync
+            cursor: the stripe id of the last object of the page
+        """
+        if self.state is None:
+            return
+        with self._lock:
+            self._cursors[index] = cursor
+            last_cursor = None
+            while self._next in self._cursors:
+                last_cursor = self._cursors.pop(self._next) or last_cursor
+                self._next += 1
+            if last_cursor:
+                self.state.cursor = last_cursor
+                self.state.save(update_fields=["cursor", "modified_at"])
+
+
+class StripeSyncState:
+    # stripe lists the events of the last 30 days
+    EVENT_RETENTION = 30 * 24 * 60 * 60
+
+    @classmethod
+    def is_livemode(cls):
+        """
+        Whether the configured API key belongs to live mode
+        """
+        return (stripe.api_key or "").startswith(("sk_live_", "rk_live_"))
+
+    @classmethod
+    def get_name(cls, resource, shard=None):
+        """
+        Returns the name of the sync state of a resource, each shard of a
+        resource has its own sync state
+        Args:
+            resource: name of the synced resource
+            shard: optionally, the synced shard of the resource
+        """
+        if shard is None:
+            return resource
+        return "{}:{}".format(resource, shard)
+
+    @classmethod
+    def get(cls, resource, shard=None):
+        """
+        Get the sync state of a resource for the mode of the API key
+        Args:
+            resource: name of the synced resource
+            shard: optionally, the synced shard of the resource
+        Returns:
+            a sync state object, None if `SYNC_STATE_MODEL` is not set
+        """
+        if stripe_settings.SYNC_STATE_MODEL is None:
+            return None
+
+        state, _ = stripe_settings.SYNC_STATE_MODEL.objects.get_or_create(
+            resource=cls.get_name(resource, shard), livemode=cls.is_livemode()
+        )
+        return state
+
+    @classmethod
+    def get_finished_generations(cls, resource, count):
+        """
+        Returns the generations of the latest full syncs of every shard of a
+        resource, once none of them is running
+        Args:
+            resource: name of the synced resource
+            count: the number of shards of the resource
+        Returns:
+            list of the generations, None if a shard has not finished its sync
+            or if `SYNC_STATE_MODEL` is not set
+        """
+        if stripe_settings.SYNC_STATE_MODEL is None:
+            return None
+
+        names = [
+            cls.get_name(resource, Shard("{}/{}".format(index, count)))
+            for index in range(count)
+        ]
+        states = stripe_settings.SYNC_STATE_MODEL.objects.filter(
+            resource__in=names, livemode=cls.is_livemode()
+        )
+        generations = []
+        for state in states:
+            # a running sync has a newer generation than its last_created
+            if (
+                state.cursor
+                or state.generation is None
+                or state.last_created is None
+                or state.last_created < state.generation
+            ):
+                return None
+            generations.append(state.generation)
+        if len(generations) < count:
+            return None
+        return generations
+
+    @classmethod
+    def sync_list(
+        cls, resource, list_method, sync_many, concurrency=1, shard=None, **params
+    ):
+        """
+        Synchronizes every object of a stripe list endpoint, a page at a time
+        The cursor of the synced pages is saved in the sync state, so that an
+        interrupted sync resumes after the last synced page
+        Args:
+            resource: name of the synced resource
+            list_method: the list method of the stripe resource
+            sync_many: function syncing the objects of a page, called with the
+            objects and the generation of the sync
+            concurrency: the number of pages synced at the same time
+            shard: optionally, only sync the objects of this shard, with its own
+            sync state
+            params: the parameters of the list request
+        Returns:
+            tuple of the list of results of sync_many, and the generations of
+            the syncs whose objects are complete: the generation of the sync,
+            which is kept by a resumed sync, or once every shard has finished,
+            the generations of all of them. None while other shards are running
+        """
+        state = cls.get(resource, shard)
+        if state is not None and state.cursor and state.generation:
+            params["starting_after"] = state.cursor
+            generation = state.generation
+        else:
+            generation = int(time.time())
+            if state is not None:
+                state.cursor = ""
+                state.generation = generation
+                state.save()
+
+        checkpoint = SyncCheckpoint(state)
+
+        def sync_page(index, objects):
+            synced = objects if shard is None else shard.filter(objects)
+            result = sync_many(synced, generation)
+            checkpoint.done(index, objects[-1]["id"] if objects else None)
+            if shard is not None:
+                logger.info(
+                    "Synced page %s of %s, shard %s: %s of %s objects",
+                    index + 1,
+                    resource,
+                    shard,
+                    len(synced),
+                    len(objects),
+                )
+            return result
+
+        with WorkerPool(concurrency) as pool:
+            for index, page in enumerate(iter_pages(list_method, **params)):
+                pool.submit(sync_page, index, page["data"])
+
+        if state is not None:
+            state.cursor = ""
+            state.last_created = generation
+            state.save()
+
+        if shard is None:
+            return pool.results, [generation]
+        return pool.results, cls.get_finished_generations(resource, shard.count)
+
+    @classmethod
+    def sweep(cls, model, generations):
+        """
+        Soft deletes the objects which were not found by a full sync, i.e. the
+        ones deleted in stripe. Objects synced by other means since the sync
+        started are kept
+        Args:
+            model: the model class of the synced objects
+            generations: the generations of the full sync, one per shard when
+            it is sharded
+        Returns:
+            the number of objects soft deleted
+        """
+        return (
+            model.objects.filter(
+                date_purged__isnull=True,
+                modified_at__lt=convert_tstamp(min(generations)),
+            )
+            .exclude(sync_generation__in=generations)
+            .update(date_purged=timezone.now())
+        )
+
+    @classmethod
+    def sync_changes(cls, resource, event_types, sync_event, shard=None):
+        """
+        Synchronizes the objects changed since the previous sync of a resource,
+        from the events of their changes
+        Args:
+            resource: name of the synced resource
+            event_types: the kinds of the events of changes to the resource
+            sync_event: function syncing the object of an event
+            shard: optionally, only sync the objects of this shard, with its own
+            sync state
+        Returns:
+            list of the results of sync_event, None if the changes can't be
+            synced incrementally because there is no complete previous sync
+            within the retention period of the events
+        """
+        state = cls.get(resource, shard)
+        started = int(time.time())
+        if (
+            state is None
+            or state.cursor
+            or state.last_created is None
+            or state.last_created < started - cls.EVENT_RETENTION
+        ):
+            return None
+
+        # stripe lists the newest events first, only sync the newest change
+        # of each object
+        latest = {}
+        pages = iter_pages(
+            stripe.Event.list,
+            limit=100,
+            types=event_types,
+            created={"gte": state.last_created},
+        )
+        for page in pages:
+            for event_data in page["data"]:
+                stripe_id = event_data["data"]["object"]["id"]
+                if shard is None or stripe_id in shard:
+                    latest.setdefault(stripe_id, event_data)
+
+        results = [
+            sync_event(event_data) for event_data in reversed(list(latest.values()))
+        ]
+
+        state.last_created = started
+        state.save()
+        return results
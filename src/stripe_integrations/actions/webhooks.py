@@ -1,36 +1,110 @@
 # Standard Library
+import json
 import logging
 
 # Third Party Stuff
 import stripe
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.encoding import smart_str
-from stripe.error import InvalidRequestError
+from stripe.error import InvalidRequestError, SignatureVerificationError
 
 # Stripe Integrations Stuff
 from stripe_integrations.actions.events import StripeEvent
+from stripe_integrations.exceptions import StripeSignatureException
 from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import LRUSet
 
 logger = logging.getLogger(__name__)
 
 
 class StripeWebhook:
+    _seen_events = None
+
+    @classmethod
+    def construct_event(cls, payload, sig_header):
+        """
+        Verifies the signature of a received webhook
+        Args:
+            payload: the raw request body of the webhook
+            sig_header: the value of the `Stripe-Signature` request header
+        Returns:
+            the event data of the webhook
+        Ref Docs: https://stripe.com/docs/webhooks/signatures
+        """
+        if not stripe_settings.WEBHOOK_SECRET:
+            raise ImproperlyConfigured(
+                "WEBHOOK_SECRET must be set to verify stripe webhook signatures"
+            )
+
+        if hasattr(payload, "decode"):
+            payload = payload.decode("utf-8")
+
+        try:
+            stripe.WebhookSignature.verify_header(
+                payload,
+                sig_header,
+                stripe_settings.WEBHOOK_SECRET,
+                stripe_settings.WEBHOOK_TOLERANCE,
+            )
+        except SignatureVerificationError as e:
+            raise StripeSignatureException(smart_str(e))
+
+        return json.loads(payload)
+
+    @classmethod
+    def process_signed_webhook(cls, payload, sig_header):
+        """
+        Verifies the signature of a received webhook and processes it
+        Args:
+            payload: the raw request body of the webhook
+            sig_header: the value of the `Stripe-Signature` request header
+        """
+        event_data = cls.construct_event(payload, sig_header)
+        return cls._process_event(event_data)
+
+    @classmethod
+    def get_seen_events(cls):
+        """
+        Returns the in-process cache of recently received event ids
+        """
+        size = stripe_settings.EVENT_DEDUP_CACHE_SIZE
+        if cls._seen_events is None or cls._seen_events.maxsize != size:
+            cls._seen_events = LRUSet(size)
+        return cls._seen_events
+
     @classmethod
     def process_webhook(cls, event_data):
-        event = stripe_settings.EVENT_MODEL.objects.filter(
-            stripe_id=event_data["id"]
-        ).first()
+        """
+        Processes a received webhook whose signature is not verified
+        With signature validation, the payload would be trusted as is, so
+        the webhook is refused and must go through `process_signed_webhook`
+        Args:
+            event_data: the event data of the webhook
+        """
+        # Stripe Integrations Stuff
+        from stripe_integrations.webhooks.base import BaseWebhook
 
-        if event:
-            logger.info(
-                "Found duplicate stripe event record with event_id=%s", event.id
+        if stripe_settings.WEBHOOK_VALIDATION == BaseWebhook.SIGNATURE:
+            raise StripeSignatureException(
+                "Webhooks must be processed with process_signed_webhook "
+                "when WEBHOOK_VALIDATION is signature"
             )
+        return cls._process_event(event_data)
+
+    @classmethod
+    def _process_event(cls, event_data):
+        event_id = event_data["id"]
+        seen_events = cls.get_seen_events()
+
+        if event_id in seen_events:
+            logger.info("Found duplicate stripe event with event_id=%s", event_id)
             return
 
         if stripe.api_key:
             try:
                 # create an event and process webhook
-                StripeEvent.add(
-                    stripe_id=event_data["id"],
+                event = StripeEvent.add(
+                    stripe_id=event_id,
                     kind=event_data["type"],
                     livemode=event_data["livemode"],
                     message=event_data,
@@ -38,11 +112,16 @@ class StripeWebhook:
                     request=event_data["request"],
                     pending_webhooks=event_data["pending_webhooks"],
                 )
+                if event is None:
+                    logger.info(
+                        "Found duplicate stripe event record with event_id=%s",
+                        event_id,
+                    )
             except InvalidRequestError as e:
-                event_id = event_data["id"]
                 logger.info(
                     f"Error occurred while processing stripe webhook, event_id={event_id}, error={smart_str(e)}"
                 )
+            seen_events.add(event_id)
             return
 
         logger.info("Stripe API key not set while creating event")
@@ -3,6 +3,7 @@ import stripe
 from django.apps import AppConfig
 
 # Stripe Integrations Stuff
+from stripe_integrations import metrics
 from stripe_integrations.settings import stripe_settings
 
 
@@ -12,3 +13,5 @@ class StripeIntegrationsConfig(AppConfig):
     def ready(self):
         stripe.api_version = stripe_settings.API_VERSION
         stripe.api_key = stripe_settings.API_KEY
+        if metrics.is_enabled():
+            metrics.instrument_stripe()
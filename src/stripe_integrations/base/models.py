@@ -53,6 +53,13 @@ class StripeObject(TimeStampedUUIDModel):
             "about the object in a structured format."
         ),
     )
+    payload_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Hash of the synced data of the object, "
+        "used to skip writing the object when it is unchanged",
+    )
 
     class Meta:
         abstract = True
@@ -9,7 +9,7 @@ class WebhookRegistry(object):
     def register(self, webhook):
         self._registry[webhook.name] = {
             "webhook": webhook,
-            "signal": Signal(providing_args=["event"]),
+            "signal": Signal(providing_args=["event", "superseded"]),
         }
 
     def keys(self):
@@ -0,0 +1,193 @@
+# Standard Library
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Third Party Stuff
+import stripe
+from django.db import connections
+
+# Stripe Integrations Stuff
+from stripe_integrations.settings import stripe_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, which allows `rate` operations per second on
+    average and bursts of up to `capacity` operations
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def block(self, seconds):
+        """
+        Holds back every operation for the given number of seconds
+        """
+        with self._lock:
+            self._tokens = 0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class RateLimitedHTTPClient:
+    """
+    Wraps a stripe http client to limit the rate of the requests to stripe,
+    and to retry requests that were rate limited after an exponential backoff
+    """
+
+    max_retries = 5
+    backoff = 0.5  # seconds before the first retry
+    max_backoff = 30
+
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+
+    def __getattr__(self, attr):
+        return getattr(self.client, attr)
+
+    def request_with_retries(self, method, url, headers, post_data=None):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            response = self.client.request_with_retries(method, url, headers, post_data)
+            if response[1] != 429 or attempt >= self.max_retries:
+                return response
+
+            delay = min(self.max_backoff, self.backoff * 2**attempt)
+            delay *= random.uniform(0.5, 1)
+            logger.info("Stripe rate limit reached, retrying in %.2fs", delay)
+            # slow down every worker, not just the rate limited one
+            self.bucket.block(delay)
+            attempt += 1
+
+
+@contextmanager
+def rate_limited():
+    """
+    Limits the rate of the requests to stripe made in the block, according to
+    the SYNC_RATE_LIMIT_LIVE or SYNC_RATE_LIMIT_TEST setting of the mode of the
+    api key
+    """
+    # Stripe Integrations Stuff
+    from stripe_integrations.actions.sync import StripeSyncState
+
+    if StripeSyncState.is_livemode():
+        rate = stripe_settings.SYNC_RATE_LIMIT_LIVE
+    else:
+        rate = stripe_settings.SYNC_RATE_LIMIT_TEST
+    if not rate:
+        yield
+        return
+
+    client = stripe.default_http_client
+    if client is None:
+        client = stripe.http_client.new_default_http_client(
+            verify_ssl_certs=stripe.verify_ssl_certs, proxy=stripe.proxy
+        )
+    stripe.default_http_client = RateLimitedHTTPClient(client, TokenBucket(rate))
+    try:
+        yield
+    finally:
+        stripe.default_http_client = client
+
+
+class WorkerPool:
+    """
+    Runs tasks in a pool of threads, each with its own database connections
+    which are closed when the pool is done
+    With a concurrency of 1, tasks are run right away in the calling thread
+    Usage:
+        with WorkerPool(concurrency) as pool:
+            for item in items:
+                pool.submit(func, item)
+        pool.results  # the return values of the tasks, in no particular order
+    """
+
+    def __init__(self, concurrency=1):
+        self.concurrency = concurrency
+        self.results = []
+        self._error = None
+        self._lock = threading.Lock()
+        # bounded, so that the tasks are not produced far ahead of the workers
+        self._tasks = queue.Queue(maxsize=concurrency)
+        self._threads = []
+
+    def __enter__(self):
+        if self.concurrency > 1:
+            for _ in range(self.concurrency):
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None and exc_type is None:
+            raise self._error
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Runs func with the given arguments in the pool
+        Raises the exception of a failed task, if any, instead of running func
+        """
+        if self._error is not None:
+            raise self._error
+        if not self._threads:
+            self.results.append(func(*args, **kwargs))
+            return
+        self._tasks.put((func, args, kwargs))
+
+    def _work(self):
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    return
+                if self._error is not None:
+                    # a task failed, skip the rest
+                    continue
+                func, args, kwargs = task
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    with self._lock:
+                        if self._error is None:
+                            self._error = e
+                else:
+                    with self._lock:
+                        self.results.append(result)
+        finally:
+            connections.close_all()
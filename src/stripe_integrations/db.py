@@ -0,0 +1,305 @@
+# Standard Library
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+
+# Third Party Stuff
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router
+from django.db.models.functions import Mod
+
+# Stripe Integrations Stuff
+from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import chunked
+
+
+class HashText(models.Func):
+    """
+    Postgres' builtin hash of a text value
+    """
+
+    function = "hashtext"
+    output_field = models.IntegerField()
+
+
+def hash_partition(expression, partitions):
+    """
+    Returns an expression that assigns rows to one of `partitions`
+    partitions by hashing the text `expression`
+    """
+    # hashtext can be negative, keep the remainder in range(partitions)
+    return Mod(Mod(HashText(expression), partitions) + partitions, partitions)
+
+
+def _insert_values(model, objs, connection):
+    """
+    Returns the fields, the VALUES rows and the parameters to insert objects
+    """
+    fields = model._meta.concrete_fields
+    rows, params = [], []
+    for obj in objs:
+        rows.append("(%s)" % ", ".join(["%s"] * len(fields)))
+        params.extend(
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        )
+    return fields, rows, params
+
+
+def bulk_insert(model, objs, conflict_field="stripe_id"):
+    """
+    Inserts objects with a single INSERT ... ON CONFLICT DO NOTHING statement
+    Rows which already exist are skipped instead of raising an IntegrityError,
+    even when they are inserted concurrently
+    Args:
+        model: the model class of the objects
+        objs: the unsaved model objects
+        conflict_field: name of the unique field that identifies existing rows
+    Returns:
+        list of the objects that were inserted
+    """
+    if not objs:
+        return []
+
+    opts = model._meta
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    conflict_column = opts.get_field(conflict_field).column
+    fields, rows, params = _insert_values(model, objs, connection)
+
+    sql = (
+        "INSERT INTO {table} ({columns}) VALUES {rows} "
+        "ON CONFLICT ({key}) DO NOTHING RETURNING {key}"
+    ).format(
+        table=quote_name(opts.db_table),
+        columns=", ".join(quote_name(field.column) for field in fields),
+        rows=", ".join(rows),
+        key=quote_name(conflict_column),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        inserted_keys = {row[0] for row in cursor.fetchall()}
+
+    inserted = []
+    for obj in objs:
+        key = getattr(obj, conflict_field)
+        if key in inserted_keys:
+            # a key can only be inserted once, even if it is repeated in objs
+            inserted_keys.discard(key)
+            obj._state.adding = False
+            obj._state.db = using
+            inserted.append(obj)
+    return inserted
+
+
+def bulk_upsert(
+    model, objs, update_fields, conflict_field="stripe_id", batch_size=None
+):
+    """
+    Inserts objects, or updates the given fields of the rows which already
+    exist, with INSERT ... ON CONFLICT DO UPDATE statements
+    Args:
+        model: the model class of the objects
+        objs: the unsaved model objects
+        update_fields: names of the fields updated in existing rows
+        conflict_field: name of the unique field that identifies existing rows
+        batch_size: the maximum number of objects written per statement
+    Returns:
+        list of the objects, with the primary key of their row
+    """
+    # a statement can't update a row twice, the last object of a key wins
+    objs = list({getattr(obj, conflict_field): obj for obj in objs}.values())
+    if not objs:
+        return []
+
+    opts = model._meta
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    conflict_column = opts.get_field(conflict_field).column
+    update_columns = [opts.get_field(name).column for name in update_fields]
+    # e.g. modified_at
+    update_columns.extend(
+        field.column
+        for field in opts.concrete_fields
+        if getattr(field, "auto_now", False) and field.column not in update_columns
+    )
+
+    for batch in chunked(objs, batch_size or len(objs)):
+        fields, rows, params = _insert_values(model, batch, connection)
+        sql = (
+            "INSERT INTO {table} ({columns}) VALUES {rows} "
+            "ON CONFLICT ({key}) DO UPDATE SET {updates} RETURNING {key}, {pk}"
+        ).format(
+            table=quote_name(opts.db_table),
+            columns=", ".join(quote_name(field.column) for field in fields),
+            rows=", ".join(rows),
+            key=quote_name(conflict_column),
+            updates=", ".join(
+                "{0} = EXCLUDED.{0}".format(quote_name(column))
+                for column in update_columns
+            ),
+            pk=quote_name(opts.pk.column),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            pks = dict(cursor.fetchall())
+
+        for obj in batch:
+            # existing rows keep their primary key
+            obj.pk = pks[getattr(obj, conflict_field)]
+            obj._state.adding = False
+            obj._state.db = using
+    return objs
+
+
+class PayloadEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder of field values, which encodes related objects as their
+    primary key
+    """
+
+    def default(self, o):
+        if isinstance(o, models.Model):
+            return o.pk
+        return super().default(o)
+
+
+def payload_hash(values):
+    """
+    Returns the hash of the field values of a synced object, which is stored
+    in its payload_hash field to tell whether a later sync changes the row
+    Args:
+        values: dict of the field values
+    """
+    payload = json.dumps(values, sort_keys=True, cls=PayloadEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SyncCounts:
+    """
+    Numbers of objects written, unchanged and skipped by syncs
+    """
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, written=0, unchanged=0, skipped=0):
+        with self._lock:
+            self.written += written
+            self.unchanged += unchanged
+            self.skipped += skipped
+
+    def __str__(self):
+        return "{} written, {} unchanged, {} skipped".format(
+            self.written, self.unchanged, self.skipped
+        )
+
+
+_counts = None
+
+
+@contextmanager
+def count_writes():
+    """
+    Counts the objects written, unchanged and skipped by the syncs run in the
+    block, from any thread
+    Usage:
+        with count_writes() as counts:
+            StripeProduct.sync_all()
+        print(counts)
+    """
+    global _counts
+    previous, _counts = _counts, SyncCounts()
+    try:
+        yield _counts
+    finally:
+        _counts = previous
+
+
+def record_writes(written=0, unchanged=0, skipped=0):
+    """
+    Adds to the counts of the enclosing count_writes block, if any
+    """
+    if _counts is not None:
+        _counts.add(written=written, unchanged=unchanged, skipped=skipped)
+
+
+def update_or_create(model, defaults, **lookup):
+    """
+    Same as QuerySet.update_or_create, storing the payload_hash of the
+    defaults. With SYNC_SKIP_UNCHANGED an existing row with the same
+    payload_hash is not written
+    Returns:
+        tuple of the object, and whether it was created
+    """
+    defaults = dict(defaults, payload_hash=payload_hash(defaults))
+    if stripe_settings.SYNC_SKIP_UNCHANGED:
+        obj = model.objects.filter(**lookup).first()
+        if obj is not None and obj.payload_hash == defaults["payload_hash"]:
+            record_writes(unchanged=1)
+            return obj, False
+
+    obj, created = model.objects.update_or_create(defaults=defaults, **lookup)
+    record_writes(written=1)
+    return obj, created
+
+
+def bulk_upsert_changed(model, objs, update_fields, batch_size=None, touch=None):
+    """
+    Same as bulk_upsert for objects identified by their stripe_id, storing the
+    payload_hash of their update_fields. With SYNC_SKIP_UNCHANGED the objects
+    whose row has the same payload_hash are not written, only their primary
+    key is looked up
+    Args:
+        model: the model class of the objects
+        objs: the unsaved model objects
+        update_fields: names of the fields updated in existing rows
+        batch_size: the maximum number of objects written per statement
+        touch: optionally, dict of field values updated in existing rows, which
+        are also set on the rows of the unchanged objects when they differ
+    Returns:
+        list of the objects, with the primary key of their row
+    """
+    fields = [model._meta.get_field(name) for name in update_fields]
+    for obj in objs:
+        obj.payload_hash = payload_hash(
+            {field.name: field.value_from_object(obj) for field in fields}
+        )
+
+    changed, unchanged = objs, []
+    if stripe_settings.SYNC_SKIP_UNCHANGED and objs:
+        rows = model.objects.filter(
+            stripe_id__in=[obj.stripe_id for obj in objs]
+        ).values_list("stripe_id", "pk", "payload_hash")
+        rows = {stripe_id: (pk, stored_hash) for stripe_id, pk, stored_hash in rows}
+
+        changed = []
+        for obj in objs:
+            pk, stored_hash = rows.get(obj.stripe_id, (None, None))
+            if stored_hash != obj.payload_hash:
+                changed.append(obj)
+                continue
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = router.db_for_write(model)
+            unchanged.append(obj)
+
+        if touch and unchanged:
+            model.objects.filter(pk__in=[obj.pk for obj in unchanged]).exclude(
+                **touch
+            ).update(**touch)
+
+    written = bulk_upsert(
+        model,
+        changed,
+        [*update_fields, *(touch or {}), "payload_hash"],
+        batch_size=batch_size,
+    )
+    record_writes(written=len(written), unchanged=len(unchanged))
+    return written + unchanged
@@ -14,3 +14,7 @@ class StripeException(Exception):
 
 class StripeAuthException(StripeException):
     default_detail = _("Stripe auth error")
+
+
+class StripeSignatureException(StripeException):
+    default_detail = _("Stripe webhook signature verification failed")
@@ -0,0 +1,58 @@
+# Standard Library
+import json
+import zlib
+
+# Third Party Stuff
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    return zlib.compress(data)
+
+
+def decompress(data):
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImproperlyConfigured(
+                "The zstandard package is required to read zstd compressed values"
+            )
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    A JSON field which stores its value compressed, with zstd if the
+    zstandard package is installed or else with zlib
+    Values can't be queried by their keys in the database
+    """
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return compress(json.dumps(value, cls=DjangoJSONEncoder).encode())
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return json.loads(decompress(bytes(value)))
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return json.loads(decompress(bytes(value)))
+        return value
+
+    def value_to_string(self, obj):
+        # serialized as plain json, e.g. when events are archived
+        return self.value_from_object(obj)
@@ -0,0 +1,57 @@
+# Standard Library
+import gzip
+import logging
+import os
+
+# Third Party Stuff
+import stripe
+from django.core.management import BaseCommand, CommandError
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeSnapshot
+from stripe_integrations.concurrency import rate_limited
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Export (ONLY READ from stripe) objects from stripe to gzip compressed JSON
+    lines files
+
+    command: python manage.py export_stripe_data DIRECTORY [products prices ...]
+    """
+
+    help = "Export stripe data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory", help="Directory the files are written to, one per resource"
+        )
+        parser.add_argument(
+            "resources",
+            nargs="*",
+            help="Resources to export, any of products, prices, coupons, "
+            "customers and subscriptions (default: all of them)",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["resources"]) - set(StripeSnapshot.RESOURCES)
+        if unknown:
+            raise CommandError("Unknown resources: {0}".format(", ".join(unknown)))
+
+        if not stripe.api_key:
+            logger.info("Stripe API key not set while exporting data")
+            return
+
+        os.makedirs(options["directory"], exist_ok=True)
+        with rate_limited():
+            for resource in options["resources"] or StripeSnapshot.RESOURCES:
+                path = os.path.join(
+                    options["directory"], StripeSnapshot.get_filename(resource)
+                )
+                with gzip.open(path, "wt") as file:
+                    count = StripeSnapshot.export(resource, file)
+                self.stdout.write(
+                    "Exported {0} {1} to {2}".format(count, resource, path)
+                )
@@ -0,0 +1,62 @@
+# Standard Library
+import gzip
+import os
+
+# Third Party Stuff
+from django.core.management import BaseCommand, CommandError
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeSnapshot
+from stripe_integrations.db import count_writes
+
+
+class Command(BaseCommand):
+    """
+    Import (UPDATE_OR_CREATE in local DB, without requests to stripe) objects from
+    the files written by export_stripe_data. Customers are only updated, like
+    sync_stripe_customers does, so customers and subscriptions are skipped when
+    their local customer doesn't exist, e.g. in an empty database
+
+    command: python manage.py import_stripe_data DIRECTORY [products prices ...]
+    """
+
+    help = (
+        "Import stripe data. Customers and subscriptions are only imported for "
+        "the existing local customers, the others are reported as skipped"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory the files were exported to")
+        parser.add_argument(
+            "resources",
+            nargs="*",
+            help="Resources to import, any of products, prices, coupons, "
+            "customers and subscriptions (default: all of the exported ones)",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["resources"]) - set(StripeSnapshot.RESOURCES)
+        if unknown:
+            raise CommandError("Unknown resources: {0}".format(", ".join(unknown)))
+
+        resources = options["resources"]
+        for resource in resources:
+            path = os.path.join(
+                options["directory"], StripeSnapshot.get_filename(resource)
+            )
+            if not os.path.exists(path):
+                raise CommandError("{0} was not exported".format(path))
+
+        # the resources are loaded in order, e.g. prices after their products
+        for resource in StripeSnapshot.RESOURCES:
+            if resources and resource not in resources:
+                continue
+            path = os.path.join(
+                options["directory"], StripeSnapshot.get_filename(resource)
+            )
+            if not os.path.exists(path):
+                continue
+
+            with gzip.open(path, "rt") as file, count_writes() as counts:
+                count = StripeSnapshot.load(resource, file)
+            self.stdout.write("Read {0} {1}: {2}".format(count, resource, counts))
@@ -0,0 +1,156 @@
+# Standard Library
+import logging
+import multiprocessing
+import signal
+import threading
+
+# Third Party Stuff
+import django
+import stripe
+from django.core.management import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Processes the pending events of a partition until it is stopped
+    """
+
+    def __init__(self, partition=None, partitions=1, batch_size=100, sleep=1.0):
+        self.partition = partition
+        self.partitions = partitions
+        self.batch_size = batch_size
+        self.sleep = sleep
+        self.stopping = threading.Event()
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self, once=False):
+        # finish the current batch before exiting on shutdown
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                count = StripeEvent.process_pending(
+                    batch_size=self.batch_size,
+                    partition=self.partition,
+                    partitions=self.partitions,
+                )
+                if count:
+                    logger.info(
+                        "Processed %s stripe events, partition=%s",
+                        count,
+                        self.partition,
+                    )
+                    continue
+
+                if once:
+                    break
+                self.stopping.wait(self.sleep)
+        finally:
+            connections.close_all()
+
+
+def run_worker(once, **kwargs):
+    django.setup()
+    Worker(**kwargs).run(once=once)
+
+
+class Command(BaseCommand):
+    """
+    Process the events queued by webhooks (EVENT_PROCESSING_MODE = "queue")
+    Multiple workers can run this command at the same time. With multiple
+    partitions, the events of a customer are always processed in order by the
+    worker of its partition
+
+    command: python manage.py process_stripe_events
+    """
+
+    help = "Process queued stripe events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of events claimed by the worker at a time",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when there are no events",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no pending events left",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, each one processes its own partition",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            default=None,
+            help="Total number of partitions across hosts (default: --workers). "
+            "Hosts with the default partitions all process the same partitions",
+        )
+        parser.add_argument(
+            "--partition",
+            type=int,
+            default=0,
+            help="First partition processed by the workers of this host",
+        )
+
+    def handle(self, *args, **options):
+        if not stripe.api_key:
+            logger.info("Stripe API key not set while processing events")
+            return
+
+        workers = options["workers"]
+        partitions = options["partitions"] or workers
+        if options["partition"] + workers > partitions:
+            raise CommandError("The workers exceed the number of partitions")
+
+        kwargs = dict(
+            partitions=partitions,
+            batch_size=options["batch_size"],
+            sleep=options["sleep"],
+        )
+        if partitions == 1:
+            Worker(**kwargs).run(once=options["once"])
+            return
+
+        # connections can't be shared with the worker processes
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(options["once"],),
+                kwargs=dict(kwargs, partition=options["partition"] + index),
+            )
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        def stop(*args):
+            for process in processes:
+                process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for process in processes:
+            process.join()
@@ -0,0 +1,66 @@
+# Standard Library
+import gzip
+import logging
+
+# Third Party Stuff
+from django.core.management import BaseCommand, CommandError
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeEvent
+from stripe_integrations.settings import stripe_settings
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Delete (or archive and delete) processed events older than the retention period
+
+    command: python manage.py purge_stripe_events --days 90
+    """
+
+    help = "Purge old events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Number of days events are kept for (default: EVENT_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of events deleted at a time",
+        )
+        parser.add_argument(
+            "--archive",
+            default=None,
+            help="File the events are appended to as JSON lines before they are "
+            "deleted, gzip compressed if it ends with .gz",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = stripe_settings.EVENT_RETENTION_DAYS
+        if days is None:
+            raise CommandError("Set --days or EVENT_RETENTION_DAYS")
+
+        archive = None
+        if options["archive"]:
+            if options["archive"].endswith(".gz"):
+                archive = gzip.open(options["archive"], "at")
+            else:
+                archive = open(options["archive"], "a")
+
+        try:
+            deleted = StripeEvent.purge(
+                days, batch_size=options["batch_size"], archive=archive
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+
+        logger.info("Purged %s stripe events", deleted)
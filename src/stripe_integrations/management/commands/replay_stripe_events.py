@@ -0,0 +1,62 @@
+# Standard Library
+import logging
+from collections import Counter
+from datetime import datetime
+
+# Third Party Stuff
+import stripe
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+
+def parse_since(value):
+    """
+    Converts a unix timestamp, date or datetime string to a unix timestamp
+    """
+    if value.isdigit():
+        return int(value)
+
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError("Invalid --since value: {}".format(value))
+        since = datetime(date.year, date.month, date.day)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.utc)
+    return int(since.timestamp())
+
+
+class Command(BaseCommand):
+    """
+    Replay (ONLY CREATE AND PROCESS the events missing in local DB) events from stripe
+
+    command: python manage.py replay_stripe_events --since 2023-05-01
+    """
+
+    help = "Replay missing events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=parse_since,
+            default=None,
+            help="Unix timestamp, date or datetime to replay events from "
+            "(default: the checkpoint of the previous replay)",
+        )
+
+    def handle(self, *args, **options):
+        if not stripe.api_key:
+            logger.info("Stripe API key not set while replaying events")
+            return
+
+        outcomes = StripeEvent.replay(since=options["since"])
+        for outcome, count in sorted(Counter(outcomes.values()).items()):
+            self.stdout.write("{}: {}\n".format(outcome, count))
+        logger.info("Replayed %s stripe events", len(outcomes))
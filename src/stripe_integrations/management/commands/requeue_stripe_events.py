@@ -0,0 +1,56 @@
+# Standard Library
+import logging
+
+# Third Party Stuff
+from django.core.management import BaseCommand
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Requeue the events given up on after failing EVENT_MAX_ATTEMPTS times, e.g.
+    once the cause of their failure is fixed
+
+    command: python manage.py requeue_stripe_events
+    """
+
+    help = "Requeue failed events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            default=None,
+            help="Only requeue the events of this kind",
+        )
+        parser.add_argument(
+            "--event",
+            action="append",
+            default=None,
+            help="Stripe id of an event to requeue, can be repeated",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the events that would be requeued",
+        )
+
+    def handle(self, *args, **options):
+        events = StripeEvent.get_abandoned()
+        if options["kind"]:
+            events = events.filter(kind=options["kind"])
+        if options["event"]:
+            events = events.filter(stripe_id__in=options["event"])
+
+        if options["dry_run"]:
+            for event in events.iterator():
+                self.stdout.write(
+                    "{} {} {}".format(event.stripe_id, event.kind, event.target_id)
+                )
+            return
+
+        requeued = StripeEvent.requeue(events)
+        logger.info("Requeued %s stripe events", requeued)
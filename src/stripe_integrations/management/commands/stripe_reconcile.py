@@ -0,0 +1,234 @@
+# Standard Library
+import decimal
+import json
+import logging
+
+# Third Party Stuff
+import stripe
+from django.core.management import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models.functions import Collate
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import (
+    StripeCoupon,
+    StripeCustomer,
+    StripePrice,
+    StripeProduct,
+    StripeSubscription,
+)
+from stripe_integrations.concurrency import rate_limited
+from stripe_integrations.db import PayloadEncoder
+from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import SortedRuns, exclude_sorted, iter_pages
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = ["products", "prices", "coupons", "customers", "subscriptions"]
+
+
+def get_stripe_id(value):
+    """
+    Returns the Stripe ID of a related object, which may be expanded
+    """
+    if value is None or isinstance(value, str):
+        return value
+    return value["id"]
+
+
+def get_resource(name):
+    """
+    Returns how a resource is listed from stripe, stored locally and compared
+    Args:
+        name: name of the resource, one of RESOURCES
+    Returns:
+        dict of the list method and its parameters, the model, the filters of
+        the live local objects and their compared related objects, and a
+        function returning the expected field values of a stripe object
+    """
+    if name == "products":
+        return dict(
+            list_method=stripe.Product.list,
+            params={},
+            model=stripe_settings.PRODUCT_MODEL,
+            live={"date_purged__isnull": True},
+            related=[],
+            expected=StripeProduct.get_defaults,
+        )
+    if name == "prices":
+        return dict(
+            list_method=stripe.Price.list,
+            params={},
+            model=stripe_settings.PRICE_MODEL,
+            live={"date_purged__isnull": True},
+            related=["product"],
+            expected=lambda price: dict(
+                StripePrice.get_defaults(price, None),
+                product=StripePrice.get_product_id(price),
+            ),
+        )
+    if name == "coupons":
+        return dict(
+            list_method=stripe.Coupon.list,
+            params={"expand": ["data.applies_to"]},
+            model=stripe_settings.COUPON_MODEL,
+            live={"date_purged__isnull": True},
+            related=[],
+            expected=StripeCoupon.get_defaults,
+        )
+    if name == "customers":
+        return dict(
+            list_method=stripe.Customer.list,
+            params={},
+            model=stripe_settings.CUSTOMER_MODEL,
+            live={"is_active": True},
+            related=[],
+            expected=StripeCustomer.get_defaults,
+        )
+    return dict(
+        list_method=stripe.Subscription.list,
+        params={"status": "all"},
+        model=stripe_settings.SUBSCRIPTION_MODEL,
+        live={},
+        related=[stripe_settings.CUSTOMER_FIELD_NAME],
+        expected=lambda subscription: dict(
+            StripeSubscription.get_defaults(None, subscription),
+            **{
+                stripe_settings.CUSTOMER_FIELD_NAME: get_stripe_id(
+                    subscription["customer"]
+                )
+            },
+        ),
+    )
+
+
+def normalize(field, value):
+    """
+    Returns the JSON encoding of a field value, comparable between the
+    values computed from stripe and the values read from the database
+    """
+    if isinstance(field, models.DecimalField) and value is not None:
+        value = decimal.Decimal(value).quantize(
+            decimal.Decimal(1).scaleb(-field.decimal_places)
+        )
+    return json.dumps(value, sort_keys=True, cls=PayloadEncoder)
+
+
+class Command(BaseCommand):
+    """
+    Report (READ ONLY, nothing is written to the local DB) the differences
+    between the local objects and stripe, as JSON lines
+
+    command: python manage.py stripe_reconcile [products prices ...]
+    """
+
+    help = "Report differences between the local objects and stripe"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "resources",
+            nargs="*",
+            help="Resources to reconcile, any of products, prices, coupons, "
+            "customers and subscriptions (default: all of them)",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["resources"]) - set(RESOURCES)
+        if unknown:
+            raise CommandError("Unknown resources: {0}".format(", ".join(unknown)))
+
+        if not stripe.api_key:
+            logger.info("Stripe API key not set while reconciling")
+            return
+
+        with rate_limited():
+            for name in options["resources"] or RESOURCES:
+                counts = self.reconcile(name)
+                self.stderr.write(
+                    "{0}: {missing} missing, {extra} extra, "
+                    "{different} different".format(name, **counts)
+                )
+
+    def report(self, resource, stripe_id, status, fields=None):
+        record = {"resource": resource, "stripe_id": stripe_id, "status": status}
+        if fields:
+            record["fields"] = fields
+        self.stdout.write(json.dumps(record, sort_keys=True, cls=PayloadEncoder))
+
+    def reconcile(self, name):
+        """
+        Streams the objects of a resource from stripe and compares each page
+        with the local objects of the page, then merges the sorted stripe ids
+        found locally with the sorted stripe ids of the local objects, streamed
+        from the database, to find the local objects which were not listed.
+        The stripe ids are sorted on disk, so the memory used doesn't grow with
+        the number of objects, and nothing is written to the database
+        Returns:
+            dict of the number of missing, extra and different objects
+        """
+        resource = get_resource(name)
+        live_objects = resource["model"].objects.filter(**resource["live"])
+        with SortedRuns() as seen:
+            counts = self.compare(name, resource, live_objects, seen)
+            # the ids are sorted by code point, like python sorts them, and
+            # streamed with a cursor, which needs a transaction with poolers
+            local_ids = (
+                live_objects.order_by(Collate("stripe_id", "C"))
+                .values_list("stripe_id", flat=True)
+                .iterator(chunk_size=2000)
+            )
+            with transaction.atomic(using=live_objects.db):
+                for stripe_id in exclude_sorted(local_ids, seen):
+                    counts["extra"] += 1
+                    self.report(name, stripe_id, "extra")
+        return counts
+
+    def compare(self, name, resource, live_objects, seen):
+        """
+        Compares each page of the objects of a resource listed from stripe
+        with its local objects, fetched with a single query, and adds the
+        stripe ids found locally to `seen`, see `SortedRuns`
+        Returns:
+            dict of the number of missing, extra and different objects
+        """
+        model = resource["model"]
+        counts = {"missing": 0, "extra": 0, "different": 0}
+
+        pages = iter_pages(resource["list_method"], limit=100, **resource["params"])
+        for page in pages:
+            local_objects = live_objects.select_related(*resource["related"]).in_bulk(
+                [stripe_object["id"] for stripe_object in page["data"]],
+                field_name="stripe_id",
+            )
+            for stripe_object in page["data"]:
+                local_object = local_objects.get(stripe_object["id"])
+                if local_object is None:
+                    counts["missing"] += 1
+                    self.report(name, stripe_object["id"], "missing")
+                    continue
+
+                fields = self.diff(
+                    model, local_object, resource["expected"](stripe_object)
+                )
+                if fields:
+                    counts["different"] += 1
+                    self.report(name, stripe_object["id"], "different", fields)
+            seen.extend(local_objects)
+        return counts
+
+    def diff(self, model, local_object, expected):
+        """
+        Returns the fields whose local value differs from the expected one,
+        related objects being compared by their stripe id
+        """
+        fields = {}
+        for name, value in expected.items():
+            field = model._meta.get_field(name)
+            if field.is_relation:
+                related = getattr(local_object, name)
+                local_value = related.stripe_id if related is not None else None
+            else:
+                local_value = field.value_from_object(local_object)
+            if normalize(field, local_value) != normalize(field, value):
+                fields[name] = {"local": local_value, "stripe": value}
+        return fields
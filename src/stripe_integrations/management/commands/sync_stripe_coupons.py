@@ -7,6 +7,9 @@ from django.core.management import BaseCommand
 
 # Stripe Integrations Stuff
 from stripe_integrations.actions import StripeCoupon
+from stripe_integrations.concurrency import rate_limited
+from stripe_integrations.db import count_writes
+from stripe_integrations.utils import Shard
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +19,43 @@ class Command(BaseCommand):
     Sync (UPDATE_OR_CREATE in local DB) soupons from stripe
 
     command: python manage.py sync_stripe_coupons
+        [--concurrency N] [--incremental] [--shard i/N]
     """
 
     help = "Sync coupons"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of pages of coupons synced at the same time (default: 1)",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only sync the coupons changed since the previous sync",
+        )
+        parser.add_argument(
+            "--shard",
+            type=Shard.parse,
+            default=None,
+            help="Only sync the shard i of N shards of the coupons, by their stripe "
+            "id, e.g. 0/4. Every shard still lists all the coupons from stripe",
+        )
+
     def handle(self, *args, **options):
         if not stripe.api_key:
             logger.info("Stripe API key not set while syncing coupons")
             return
 
-        StripeCoupon.sync_all()
-        logger.info("Synced stripe coupons")
+        with rate_limited(), count_writes() as counts:
+            StripeCoupon.sync_all(
+                concurrency=options["concurrency"],
+                incremental=options["incremental"],
+                shard=options["shard"],
+            )
+        if options["shard"]:
+            logger.info("Synced stripe coupons, shard %s: %s", options["shard"], counts)
+        else:
+            logger.info("Synced stripe coupons: %s", counts)
@@ -10,56 +10,116 @@ from stripe.error import InvalidRequestError
 
 # Stripe Integrations Stuff
 from stripe_integrations.actions import StripeCustomer
+from stripe_integrations.concurrency import WorkerPool, rate_limited
+from stripe_integrations.db import count_writes, record_writes
+from stripe_integrations.settings import stripe_settings
+from stripe_integrations.utils import Shard
 
 logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
     """
-    Sync (ONLY UPDATE, it doesn't create customers if not exist in local DB) customers from stripe
+    Sync (ONLY UPDATE, it doesn't create customers if not exist in local DB)
+    customers from stripe
 
     command: python manage.py sync_stripe_customers
+        [--bulk] [--concurrency N] [--shard i/N]
     """
 
     help = "Sync customers data"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="List the customers from stripe a page at a time, "
+            "instead of retrieving them one by one",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of customers, or pages of customers with --bulk, "
+            "synced at the same time (default: 1)",
+        )
+        parser.add_argument(
+            "--shard",
+            type=Shard.parse,
+            default=None,
+            help="Only sync the shard i of N shards of the customers, by their "
+            "stripe id, e.g. 0/4. With --bulk every shard still lists all the "
+            "customers from stripe",
+        )
+
     def handle(self, *args, **options):
         if not stripe.api_key:
             logger.info("Stripe API key not set")
             return
 
+        shard = options["shard"]
+        with rate_limited(), count_writes() as counts:
+            if options["bulk"]:
+                count = StripeCustomer.sync_all(
+                    concurrency=options["concurrency"], shard=shard
+                )
+                self.stdout.write("Synced {0} customers\n".format(count))
+            else:
+                self.sync_users(options["concurrency"], shard)
+        # customers, cards and subscriptions
+        if shard:
+            self.stdout.write("Synced objects, shard {0}: {1}\n".format(shard, counts))
+        else:
+            self.stdout.write("Synced objects: {0}\n".format(counts))
+
+    def sync_users(self, concurrency, shard=None):
         User = apps.get_model(settings.AUTH_USER_MODEL)
         users = User.objects.all()
-        total = users.count()
+        if shard is None:
+            total = users.count()
+        else:
+            stripe_ids = stripe_settings.CUSTOMER_MODEL.objects.filter(
+                is_active=True
+            ).values_list("stripe_id", flat=True)
+            total = sum(
+                stripe_id in shard for stripe_id in stripe_ids.iterator(chunk_size=2000)
+            )
         count = 0
 
-        for user in users:
-            customer = StripeCustomer.get(user)
+        with WorkerPool(concurrency) as pool:
+            for user in users:
+                customer = StripeCustomer.get(user)
+                if customer and shard is not None and customer.stripe_id not in shard:
+                    continue
 
-            # show percentage of local customer's synced with stripe
-            if customer:
-                count += 1
-                percent = int(round(100 * (float(count) / float(total))))
-                self.stdout.write(
-                    "[{0}/{1} {2}%] Syncing {3} {4}\n".format(
-                        count,
-                        total,
-                        percent,
-                        user.first_name,
-                        user.last_name,
+                # show percentage of local customer's synced with stripe
+                if customer:
+                    count += 1
+                    percent = int(round(100 * (float(count) / float(total))))
+                    self.stdout.write(
+                        "[{0}/{1} {2}%] Syncing {3} {4}\n".format(
+                            count,
+                            total,
+                            percent,
+                            user.first_name,
+                            user.last_name,
+                        )
                     )
-                )
 
-                # sync local customer with stripe
-                try:
-                    customer = StripeCustomer.sync(customer)
-                except InvalidRequestError as exc:
-                    if exc.http_status == 404:
-                        # This user doesn't exist (might be in test mode)
-                        logger.info(
-                            "Stripe customer doesn't exist, user_id=%s, customer_id=%s",
-                            user.id,
-                            customer.stripe_id,
-                        )
-                        continue
-                    raise exc
+                    # sync local customer with stripe
+                    pool.submit(self.sync_customer, user, customer)
+
+    def sync_customer(self, user, customer):
+        try:
+            StripeCustomer.sync(customer)
+        except InvalidRequestError as exc:
+            if exc.http_status == 404:
+                # This user doesn't exist (might be in test mode)
+                logger.info(
+                    "Stripe customer doesn't exist, user_id=%s, customer_id=%s",
+                    user.id,
+                    customer.stripe_id,
+                )
+                record_writes(skipped=1)
+                return
+            raise exc
@@ -0,0 +1,92 @@
+# Standard Library
+import logging
+
+# Third Party Stuff
+import stripe
+from django.core.management import BaseCommand
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeSubscription
+from stripe_integrations.concurrency import rate_limited
+from stripe_integrations.db import count_writes
+from stripe_integrations.management.commands.replay_stripe_events import parse_since
+from stripe_integrations.utils import Shard
+
+logger = logging.getLogger(__name__)
+
+STATUSES = [
+    "all",
+    "active",
+    "past_due",
+    "unpaid",
+    "canceled",
+    "incomplete",
+    "incomplete_expired",
+    "trialing",
+    "paused",
+    "ended",
+]
+
+
+class Command(BaseCommand):
+    """
+    Sync (UPDATE_OR_CREATE in local DB) subscriptions of the local customers
+    from stripe
+
+    command: python manage.py sync_stripe_subscriptions
+        [--status S] [--created-after T] [--shard i/N]
+    """
+
+    help = "Sync subscriptions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            choices=STATUSES,
+            default="all",
+            help="Only sync the subscriptions with this status (default: all)",
+        )
+        parser.add_argument(
+            "--created-after",
+            type=parse_since,
+            default=None,
+            help="Only sync the subscriptions created after this unix timestamp, "
+            "date or datetime",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of pages of subscriptions synced at the same time "
+            "(default: 1)",
+        )
+        parser.add_argument(
+            "--shard",
+            type=Shard.parse,
+            default=None,
+            help="Only sync the shard i of N shards of the subscriptions, by their "
+            "stripe id, e.g. 0/4. Every shard still lists all the subscriptions "
+            "from stripe",
+        )
+
+    def handle(self, *args, **options):
+        if not stripe.api_key:
+            logger.info("Stripe API key not set while syncing subscriptions")
+            return
+
+        with rate_limited(), count_writes() as counts:
+            count = StripeSubscription.sync_all(
+                status=options["status"],
+                created_after=options["created_after"],
+                concurrency=options["concurrency"],
+                shard=options["shard"],
+            )
+        if options["shard"]:
+            logger.info(
+                "Synced %s stripe subscriptions, shard %s: %s",
+                count,
+                options["shard"],
+                counts,
+            )
+        else:
+            logger.info("Synced %s stripe subscriptions: %s", count, counts)
@@ -0,0 +1,200 @@
+# Standard Library
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+# Third Party Stuff
+import stripe
+from django.db import connection
+
+# Stripe Integrations Stuff
+from stripe_integrations.settings import stripe_settings
+
+_tags = ContextVar("stripe_integrations_metrics_tags", default={})
+_backends = {}
+
+
+class NullMetrics:
+    """
+    Metrics backend which discards every measurement
+    Backends record measurements by overriding `increment` and `timing`
+    """
+
+    def increment(self, name, value=1, **tags):
+        pass
+
+    def timing(self, name, seconds, **tags):
+        pass
+
+
+class InMemoryMetrics(NullMetrics):
+    """
+    Metrics backend which aggregates the measurements in process, to be read
+    by an exporter or logged with `snapshot()`
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._timings = {}
+
+    @staticmethod
+    def _key(name, tags):
+        return name, tuple(sorted(tags.items()))
+
+    def increment(self, name, value=1, **tags):
+        key = self._key(name, tags)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def timing(self, name, seconds, **tags):
+        key = self._key(name, tags)
+        with self._lock:
+            stats = self._timings.get(key)
+            if stats is None:
+                self._timings[key] = {
+                    "count": 1,
+                    "total": seconds,
+                    "min": seconds,
+                    "max": seconds,
+                }
+            else:
+                stats["count"] += 1
+                stats["total"] += seconds
+                stats["min"] = min(stats["min"], seconds)
+                stats["max"] = max(stats["max"], seconds)
+
+    def snapshot(self):
+        """
+        Returns the aggregated measurements
+        Returns:
+            dict with the list of `counters`, each with its name, tags and value,
+            and the list of `timings`, each with its name, tags, count, total,
+            min and max in seconds
+        """
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "tags": dict(tags), "value": value}
+                    for (name, tags), value in self._counters.items()
+                ],
+                "timings": [
+                    dict(stats, name=name, tags=dict(tags))
+                    for (name, tags), stats in self._timings.items()
+                ],
+            }
+
+
+def get_metrics():
+    """
+    Returns the instance of the configured METRICS_BACKEND
+    """
+    backend = stripe_settings.METRICS_BACKEND or NullMetrics
+    try:
+        return _backends[backend]
+    except KeyError:
+        return _backends.setdefault(backend, backend())
+
+
+def is_enabled():
+    return stripe_settings.METRICS_BACKEND is not None
+
+
+@contextmanager
+def tagged(**tags):
+    """
+    Adds tags to the measurements recorded in the block
+    """
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def increment(name, value=1, **tags):
+    get_metrics().increment(name, value, **{**_tags.get(), **tags})
+
+
+def timing(name, seconds, **tags):
+    get_metrics().timing(name, seconds, **{**_tags.get(), **tags})
+
+
+@contextmanager
+def timer(name, **tags):
+    """
+    Records the duration of the block, even when it raises
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing(name, time.perf_counter() - start, **tags)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    with timer("db.query"):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def instrument_queries():
+    """
+    Records the duration of the database queries run in the block
+    """
+    if not is_enabled():
+        yield
+        return
+    with connection.execute_wrapper(_query_wrapper):
+        yield
+
+
+class InstrumentedHTTPClient:
+    """
+    Wraps a stripe http client to record the duration of the requests to stripe
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, attr):
+        return getattr(self.client, attr)
+
+    def request_with_retries(self, method, url, headers, post_data=None):
+        # e.g. /v1/customers/cus_123 is a request to the customers resource
+        path = urlsplit(url).path.split("/")
+        resource = path[2] if len(path) > 2 else ""
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = self.client.request_with_retries(method, url, headers, post_data)
+            status = response[1]
+            return response
+        finally:
+            timing(
+                "stripe.request",
+                time.perf_counter() - start,
+                method=method,
+                resource=resource,
+                status=status,
+            )
+
+
+def instrument_stripe():
+    """
+    Installs the instrumented http client as the default stripe client
+    """
+    client = stripe.default_http_client
+    if isinstance(client, InstrumentedHTTPClient):
+        return
+    if client is None:
+        client = stripe.http_client.new_default_http_client(
+            verify_ssl_certs=stripe.verify_ssl_certs, proxy=stripe.proxy
+        )
+    stripe.default_http_client = InstrumentedHTTPClient(client)
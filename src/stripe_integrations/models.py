@@ -2,9 +2,10 @@
 import stripe
 from django.contrib.postgres.fields import ArrayField, CIEmailField
 from django.db import models
+from django.db.models import Q
 
 # Stripe Integrations Stuff
-from stripe_integrations.base.models import StripeObject
+from stripe_integrations.base.models import StripeObject, TimeStampedUUIDModel
 from stripe_integrations.utils import CURRENCY_SYMBOLS
 
 USD = "usd"
@@ -384,16 +385,52 @@ class StripeBaseEvent(StripeObject):
         "to the URLs we’ve specified",
     )
     api_version = models.CharField(max_length=128, blank=True)
+    target_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Stripe id of the customer, or else the object, the event applies to",
+    )
+    failed_attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of times processing the event has failed",
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the event was claimed by a worker processing it",
+    )
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the processing of a failed event is retried",
+    )
 
     @property
     def message(self):
-        return self.validated_message
+        """
+        The validated message, which may only hold the keys that differ from
+        the webhook message
+        """
+        if self.validated_message is None:
+            return None
+        return {**self.webhook_message, **self.validated_message}
 
     def __str__(self):
         return "{} - {}".format(self.kind, self.stripe_id)
 
     class Meta:
         abstract = True
+        indexes = [
+            # pending events are processed, and old events purged, oldest first
+            models.Index(fields=["processed", "created_at"]),
+            models.Index(fields=["kind", "created_at"]),
+            # only index the queue, which stays small when old events are purged
+            models.Index(
+                fields=["created_at"],
+                name="%(app_label)s_%(class)s_pending",
+                condition=Q(processed=False) & ~Q(valid=False),
+            ),
+        ]
 
 
 class StripeBaseCoupon(StripeObject):
@@ -481,6 +518,9 @@ class StripeBaseCoupon(StripeObject):
     # Soft delete price in DB on deletion from stripe
     date_purged = models.DateTimeField(null=True, editable=False)
 
+    # Generation of the last full sync which found the object in stripe
+    sync_generation = models.BigIntegerField(default=0, db_index=True, editable=False)
+
     def __str__(self):
         if self.amount_off is None:
             description = "{}% off".format(
@@ -564,6 +604,9 @@ class StripeBaseProduct(StripeObject):
     # Soft delete product in DB on deletion from stripe
     date_purged = models.DateTimeField(null=True, editable=False)
 
+    # Generation of the last full sync which found the object in stripe
+    sync_generation = models.BigIntegerField(default=0, db_index=True, editable=False)
+
     class Meta:
         abstract = True
 
@@ -711,5 +754,48 @@ class StripeBasePrice(StripeObject):
     # Soft delete price in DB on deletion from stripe
     date_purged = models.DateTimeField(null=True, editable=False)
 
+    # Generation of the last full sync which found the object in stripe
+    sync_generation = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class StripeBaseSyncState(TimeStampedUUIDModel):
+    """
+    Checkpoint of the sync of a stripe resource, it lets repeated and
+    interrupted syncs continue where the previous one stopped
+    """
+
+    resource = models.CharField(
+        max_length=255,
+        help_text="Name of the synced resource, e.g. events or products",
+    )
+    livemode = models.BooleanField(
+        default=False,
+        help_text="Whether the resource is synced from live mode or test mode",
+    )
+    cursor = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Stripe id of the last synced object of an interrupted sync",
+    )
+    last_created = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Creation time of the newest synced object. "
+        "Measured in seconds since the Unix epoch",
+    )
+    generation = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Start time of the current full sync, which marks the objects "
+        "it synced. Measured in seconds since the Unix epoch",
+    )
+
+    def __str__(self):
+        return "{} - {}".format(self.resource, "live" if self.livemode else "test")
+
     class Meta:
         abstract = True
+        unique_together = ("resource", "livemode")
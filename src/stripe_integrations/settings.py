@@ -11,10 +11,29 @@ DEFAULTS = {
     "COUPON_MODEL": "",
     "EVENT_MODEL": "",
     "SUBSCRIPTION_MODEL": "",
+    "SYNC_STATE_MODEL": None,
     "CUSTOMER_FIELD_NAME": "customer",
     "USER_FIELD_NAME": "user",
     "API_VERSION": "",
     "API_KEY": "",
+    "WEBHOOK_SECRET": "",
+    "WEBHOOK_TOLERANCE": 300,
+    "WEBHOOK_VALIDATION": "retrieve",
+    "WEBHOOK_REMOTE_VALIDATION_EVENTS": [],
+    "EVENT_PROCESSING_MODE": "inline",
+    "EVENT_MAX_ATTEMPTS": 5,
+    "EVENT_CLAIM_TIMEOUT": 300,
+    "EVENT_RETRY_BACKOFF": 60,
+    "EVENT_RETRY_BACKOFF_MAX": 3600,
+    "EVENT_DEDUP_CACHE_SIZE": 0,
+    "EVENT_COALESCE_WINDOW": 0,
+    "EVENT_RETENTION_DAYS": None,
+    "EVENT_COMPACT_MESSAGES": False,
+    "METRICS_BACKEND": None,
+    "SYNC_RATE_LIMIT_LIVE": 80,
+    "SYNC_RATE_LIMIT_TEST": 20,
+    "SYNC_BATCH_SIZE": 500,
+    "SYNC_SKIP_UNCHANGED": False,
 }
 
 IMPORT_STRINGS = [
@@ -25,6 +44,8 @@ IMPORT_STRINGS = [
     "COUPON_MODEL",
     "EVENT_MODEL",
     "SUBSCRIPTION_MODEL",
+    "SYNC_STATE_MODEL",
+    "METRICS_BACKEND",
 ]
 
 
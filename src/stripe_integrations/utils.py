@@ -1,5 +1,12 @@
 # Standard Library
+import argparse
 import decimal
+import hashlib
+import heapq
+import itertools
+import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
 # Third Party Stuff
@@ -26,6 +33,165 @@ def convert_amount_for_db(amount, currency="usd"):
     )
 
 
+def iter_pages(list_method, **params):
+    """
+    Iterates over the pages of a stripe list endpoint
+    Args:
+        list_method: the list method of a stripe resource, e.g. `stripe.Product.list`
+        params: the parameters of the list request
+    """
+    page = list_method(**params)
+    while True:
+        yield page
+        if not page["has_more"]:
+            return
+        page = page.next_page()
+
+
+def chunked(items, size):
+    """
+    Splits an iterable into lists of at most `size` items
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class LRUSet:
+    """
+    Thread safe set that only keeps the `maxsize` most recently used keys
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            if key not in self._keys:
+                return False
+            self._keys.move_to_end(key)
+            return True
+
+    def add(self, key):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+
+class SortedRuns:
+    """
+    Strings added in any order and read back sorted. They are sorted in runs
+    of `run_size` in memory, which are written to temporary files and merged
+    when read, so the memory used doesn't grow with their number
+    Usage:
+        with SortedRuns() as stripe_ids:
+            stripe_ids.extend(...)
+            for stripe_id in stripe_ids: ...
+    """
+
+    def __init__(self, run_size=100000):
+        self.run_size = run_size
+        self._run = []
+        self._files = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for file in self._files:
+            file.close()
+        self._files = []
+
+    def extend(self, keys):
+        with self._lock:
+            self._run.extend(keys)
+            if len(self._run) >= self.run_size:
+                self._spill()
+
+    def _spill(self):
+        file = tempfile.TemporaryFile("w+")
+        file.writelines(key + "\n" for key in sorted(self._run))
+        self._files.append(file)
+        self._run = []
+
+    def __iter__(self):
+        self._spill()
+        for file in self._files:
+            file.seek(0)
+        runs = [(line.rstrip("\n") for line in file) for file in self._files]
+        return heapq.merge(*runs)
+
+
+def exclude_sorted(keys, excluded):
+    """
+    Yields the keys which are not excluded, both being sorted iterables
+    """
+    excluded = iter(excluded)
+    excluded_key = next(excluded, None)
+    for key in keys:
+        while excluded_key is not None and excluded_key < key:
+            excluded_key = next(excluded, None)
+        if key != excluded_key:
+            yield key
+
+
+class Shard:
+    """
+    One of `count` partitions of the synced objects, given as "index/count",
+    e.g. "0/4". Objects are assigned to a shard by a hash of their stripe id,
+    which is the same on every host
+    """
+
+    def __init__(self, spec):
+        try:
+            index, count = spec.split("/")
+            self.index, self.count = int(index), int(count)
+        except ValueError:
+            self.index, self.count = -1, 0
+        if not 0 <= self.index < self.count:
+            raise ValueError(
+                "Invalid shard: {}, expected i/N with 0 <= i < N".format(spec)
+            )
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Returns the shard of a command line option, reporting an invalid shard
+        as an argparse error
+        """
+        try:
+            return cls(spec)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+    def __str__(self):
+        return "{}/{}".format(self.index, self.count)
+
+    def __contains__(self, key):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.count == self.index
+
+    def filter(self, stripe_objects):
+        """
+        Returns the stripe objects of a list which belong to the shard
+        """
+        return [
+            stripe_object
+            for stripe_object in stripe_objects
+            if stripe_object["id"] in self
+        ]
+
+
 CURRENCY_SYMBOLS = {
     "aud": "\u0024",
     "cad": "\u0024",
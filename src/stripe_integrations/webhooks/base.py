@@ -1,13 +1,17 @@
 # Standard Library
-import json
+import time
+from contextlib import contextmanager, nullcontext
 
 # Third Party Stuff
 import stripe
+from django.db import transaction
 from six import with_metaclass
 
 # Stripe Integrations Stuff
+from stripe_integrations import metrics
 from stripe_integrations.actions import StripeCustomer
 from stripe_integrations.base.webhooks import WebhookRegistry
+from stripe_integrations.settings import stripe_settings
 
 registry = WebhookRegistry()
 del WebhookRegistry
@@ -27,12 +31,33 @@ class BaseWebhook(with_metaclass(Registerable, object)):
     """
     REGISTRY: webhook registry
     name: webhook event name
+    coalesce_by: pending events of this kind and the same object or customer
+    which are coalesced into a single processing of the newest one
+    remote_validation: whether the event is re-fetched from stripe to validate
+    it, None follows the WEBHOOK_VALIDATION setting
+    requires_customer: whether the customer of the event is linked to it
+    atomic: whether the event is processed in a transaction
+    sync_scope: the customer data changed by the event, synced when the
+    events of a customer are coalesced
     """
 
+    # Webhook validation strategies
+    RETRIEVE = "retrieve"  # re-fetch the event from stripe
+    SIGNATURE = "signature"  # trust the payload verified by its signature
+
+    # Event coalescing targets
+    COALESCE_OBJECT = "object"
+    COALESCE_CUSTOMER = "customer"
+
     REGISTRY = registry
     name = None
+    coalesce_by = None
+    remote_validation = None
+    requires_customer = True
+    atomic = False
+    sync_scope = StripeCustomer.SYNC_ALL
 
-    def __init__(self, event):
+    def __init__(self, event, customers=None):
         if event.kind != self.name:
             raise Exception(
                 "The Webhook handler ({}) received the wrong type of Event ({})".format(
@@ -40,25 +65,68 @@ class BaseWebhook(with_metaclass(Registerable, object)):
                 )
             )
         self.event = event
+        self.customers = customers
+        self.superseded = []
+
+    @classmethod
+    def process_many(cls, events):
+        """
+        Process a group of events of this kind
+        Override to share lookups between the events of the group
+        Args:
+            events: the event objects to process
+        Returns:
+            dict of the exceptions raised by events by their stripe id
+        """
+        customers = None
+        if cls.requires_customer:
+            customers = StripeCustomer.get_for_events(events)
+        errors = {}
+        for event in events:
+            try:
+                cls(event, customers=customers).process()
+            except Exception as e:
+                errors[event.stripe_id] = e
+        return errors
+
+    def requires_remote_validation(self):
+        """
+        Whether the event data has to be fetched from stripe to validate it.
+        With signature validation the payload was already verified against the
+        endpoint signing secret, unless the event kind opts in to a re-fetch
+        """
+        if self.remote_validation is not None:
+            return self.remote_validation
+        return (
+            stripe_settings.WEBHOOK_VALIDATION != self.SIGNATURE
+            or self.name in stripe_settings.WEBHOOK_REMOTE_VALIDATION_EVENTS
+        )
 
     def validate(self):
         """
         Validate incoming events
-        We fetch the event data to ensure it is legit
+        We fetch the event data to ensure it is legit, or use the
+        signature verified webhook payload as is
+        The event is saved by `process`
         """
-        evt = stripe.Event.retrieve(
-            self.event.stripe_id,
-        )
-        self.event.validated_message = json.loads(
-            json.dumps(
-                evt.to_dict(),
-                sort_keys=True,
-            )
-        )
+        if self.requires_remote_validation():
+            validated_message = stripe.Event.retrieve(
+                self.event.stripe_id,
+            ).to_dict_recursive()
+        else:
+            validated_message = self.event.webhook_message
         self.event.valid = self.is_event_valid(
-            self.event.webhook_message["data"], self.event.validated_message["data"]
+            self.event.webhook_message["data"], validated_message["data"]
         )
-        self.event.save()
+        if stripe_settings.EVENT_COMPACT_MESSAGES:
+            # only store the keys that differ from the webhook message
+            validated_message = {
+                key: value
+                for key, value in validated_message.items()
+                if key not in self.event.webhook_message
+                or self.event.webhook_message[key] != value
+            }
+        self.event.validated_message = validated_message
 
     @staticmethod
     def is_event_valid(webhook_message_data, validated_message_data):
@@ -72,23 +140,97 @@ class BaseWebhook(with_metaclass(Registerable, object)):
     def send_signal(self):
         signal = self.REGISTRY.get_signal(self.name)
         if signal:
-            return signal.send(sender=self.__class__, event=self.event)
+            return signal.send(
+                sender=self.__class__, event=self.event, superseded=self.superseded
+            )
+
+    @contextmanager
+    def measure(self, stage):
+        """
+        Records the duration of a stage of the processing, and tags the database
+        queries and stripe requests made during the stage
+        """
+        with metrics.tagged(stage=stage), metrics.timer("webhook.stage"):
+            yield
 
     def process(self):
         if self.event.processed:
             return
-        self.validate()
-        if not self.event.valid:
+
+        with metrics.tagged(kind=self.name), metrics.instrument_queries():
+            with self.measure("validate"):
+                self.validate()
+            if not self.event.valid:
+                with self.measure("save"):
+                    self.event.save()
+                return
+
+            try:
+                with transaction.atomic() if self.atomic else nullcontext():
+                    if self.requires_customer:
+                        with self.measure("link_customer"):
+                            StripeCustomer.link_customer(
+                                self.event, customers=self.customers, save=False
+                            )
+                    with self.measure("process_webhook"):
+                        if self.superseded:
+                            self.process_webhook_coalesced()
+                        else:
+                            self.process_webhook()
+                    with self.measure("send_signal"):
+                        self.send_signal()
+                    self.event.processed = True
+                    # the validated, linked and processed event is saved at once
+                    with self.measure("save"):
+                        self.event.save()
+            except Exception as e:
+                metrics.increment("webhook.failed")
+                raise e
+
+            created = self.event.webhook_message.get("created")
+            if created is not None:
+                # time from the event being created in stripe to it being processed
+                metrics.timing("webhook.lag", time.time() - created)
+
+    def process_coalesced(self, superseded):
+        """
+        Process the event in place of older events of its kind and the same
+        object or customer
+        The older events are marked processed without being validated or
+        processed themselves, and only the signal of the event is sent, with
+        the older events as `superseded`
+        Args:
+            superseded: the older event objects
+        """
+        self.superseded = superseded
+        self.process()
+        if not self.event.processed:
             return
 
-        try:
-            StripeCustomer.link_customer(self.event)
-            self.process_webhook()
-            self.send_signal()
-            self.event.processed = True
-            self.event.save()
-        except Exception as e:
-            raise e
+        for event in superseded:
+            if self.requires_customer:
+                event.customer = self.event.customer
+            event.processed = True
+            event.save()
+
+    def get_sync_scope(self):
+        """
+        Returns the customer data changed by the event and its superseded events
+        """
+        return self.sync_scope
 
     def process_webhook(self):
         return
+
+    def process_webhook_coalesced(self):
+        """
+        Process the webhook on behalf of the superseded events as well
+        The events of a customer can target different objects, e.g. several
+        subscriptions, so the customer data changed by the events is synced
+        with its latest data from stripe
+        """
+        if self.coalesce_by == self.COALESCE_CUSTOMER:
+            if self.event.customer:
+                StripeCustomer.sync(self.event.customer, scope=self.get_sync_scope())
+            return
+        self.process_webhook()
@@ -4,6 +4,9 @@ from stripe_integrations.webhooks.base import BaseWebhook
 
 
 class CouponBaseWebhook(BaseWebhook):
+    coalesce_by = BaseWebhook.COALESCE_OBJECT
+    requires_customer = False
+
     def process_webhook(self):
         StripeCoupon.sync(self.event.message["data"]["object"])
 
@@ -23,4 +26,4 @@ class CouponDeletedWebhook(CouponBaseWebhook):
     description = "Occurs whenever a coupon is deleted."
 
     def process_webhook(self):
-        StripeCoupon.soft_delete(self.event.validated_message["data"]["object"]["id"])
+        StripeCoupon.soft_delete(self.event.message["data"]["object"]["id"])
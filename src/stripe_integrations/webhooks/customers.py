@@ -11,16 +11,33 @@ from stripe_integrations.webhooks.base import BaseWebhook
 class CustomerUpdatedWebhook(BaseWebhook):
     name = "customer.updated"
     description = "Occurs whenever any property of a customer changes."
+    coalesce_by = BaseWebhook.COALESCE_CUSTOMER
+    sync_scope = (StripeCustomer.SYNC_CUSTOMER,)
+
+    def get_sync_scope(self):
+        # the new default card is synced along with the customer details
+        for event in [self.event, *self.superseded]:
+            previous_attributes = event.webhook_message["data"].get(
+                "previous_attributes", {}
+            )
+            if "default_source" in previous_attributes:
+                return (StripeCustomer.SYNC_CUSTOMER, StripeCustomer.SYNC_CARDS)
+        return self.sync_scope
 
     def process_webhook(self):
         if self.event.customer:
             stripe_customer = self.event.message["data"]["object"]
-            StripeCustomer.sync(self.event.customer, stripe_customer)
+            StripeCustomer.sync(
+                self.event.customer, stripe_customer, scope=self.get_sync_scope()
+            )
 
 
 class CustomerCreatedWebhook(BaseWebhook):
     name = "customer.created"
     description = "Occurs whenever a new customer is created."
+    # the customer is created by the webhook, along with the link to the event
+    requires_customer = False
+    atomic = True
 
     def process_webhook(self):
         stripe_customer = self.event.message["data"]["object"]
@@ -39,9 +56,8 @@ class CustomerCreatedWebhook(BaseWebhook):
             }
             customer, _ = stripe_settings.CUSTOMER_MODEL.objects.get_or_create(**data)
 
-            # link customer to event
+            # link customer to event, saved once the event is processed
             self.event.customer = customer
-            self.event.save()
 
             # sync customer
             StripeCustomer.sync(customer, stripe_customer)
@@ -4,6 +4,9 @@ from stripe_integrations.webhooks.base import BaseWebhook
 
 
 class PriceBaseWebhook(BaseWebhook):
+    coalesce_by = BaseWebhook.COALESCE_OBJECT
+    requires_customer = False
+
     def process_webhook(self):
         StripePrice.sync(self.event.message["data"]["object"])
 
@@ -23,4 +26,4 @@ class PriceDeletedWebhook(PriceBaseWebhook):
     description = "Occurs whenever a price is deleted."
 
     def process_webhook(self):
-        StripePrice.soft_delete(self.event.validated_message["data"]["object"]["id"])
+        StripePrice.soft_delete(self.event.message["data"]["object"]["id"])
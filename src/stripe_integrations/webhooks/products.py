@@ -4,6 +4,9 @@ from stripe_integrations.webhooks.base import BaseWebhook
 
 
 class ProductBaseWebhook(BaseWebhook):
+    coalesce_by = BaseWebhook.COALESCE_OBJECT
+    requires_customer = False
+
     def process_webhook(self):
         StripeProduct.sync(self.event.message["data"]["object"])
 
@@ -21,6 +24,8 @@ class ProductUpdatedWebhook(ProductBaseWebhook):
 class ProductDeletedWebhook(BaseWebhook):
     name = "product.deleted"
     description = "Occurs whenever a product is deleted."
+    coalesce_by = BaseWebhook.COALESCE_OBJECT
+    requires_customer = False
 
     def process_webhook(self):
-        StripeProduct.soft_delete(self.event.validated_message["data"]["object"]["id"])
+        StripeProduct.soft_delete(self.event.message["data"]["object"]["id"])
@@ -4,9 +4,13 @@ from stripe_integrations.webhooks.base import BaseWebhook
 
 
 class CustomerSourceBaseWebhook(BaseWebhook):
+    # a customer sync only fetches the default source, so the events of a
+    # source are coalesced into its newest payload instead
+    coalesce_by = BaseWebhook.COALESCE_OBJECT
+
     def process_webhook(self):
         StripeCard.sync_from_stripe_data(
-            self.event.customer, self.event.validated_message["data"]["object"]
+            self.event.customer, self.event.message["data"]["object"]
         )
 
 
@@ -20,7 +24,7 @@ class CustomerSourceDeletedWebhook(BaseWebhook):
     description = "Occurs whenever a source is removed from a customer."
 
     def process_webhook(self):
-        StripeCard.delete(self.event.validated_message["data"]["object"]["id"])
+        StripeCard.delete(self.event.message["data"]["object"]["id"])
 
 
 class CustomerSourceUpdatedWebhook(CustomerSourceBaseWebhook):
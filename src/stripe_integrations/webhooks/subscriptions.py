@@ -4,16 +4,18 @@ from stripe_integrations.webhooks.base import BaseWebhook
 
 
 class CustomerSubscriptionBaseWebhook(BaseWebhook):
+    coalesce_by = BaseWebhook.COALESCE_CUSTOMER
+    sync_scope = (StripeCustomer.SYNC_SUBSCRIPTIONS,)
+
     def process_webhook(self):
-        if self.event.validated_message:
+        # the payload holds the changed subscription, the rest of the customer
+        # is synced by its own events
+        if self.event.message:
             StripeSubscription.sync_from_stripe_data(
                 self.event.customer,
-                self.event.validated_message["data"]["object"],
+                self.event.message["data"]["object"],
             )
 
-        if self.event.customer:
-            StripeCustomer.sync(self.event.customer)
-
 
 class CustomerSubscriptionCreatedWebhook(CustomerSubscriptionBaseWebhook):
     name = "customer.subscription.created"
@@ -25,6 +27,8 @@ class CustomerSubscriptionCreatedWebhook(CustomerSubscriptionBaseWebhook):
 class CustomerSubscriptionDeletedWebhook(CustomerSubscriptionBaseWebhook):
     name = "customer.subscription.deleted"
     description = "Occurs whenever a customer ends their subscription."
+    # ended subscriptions are not part of a customer sync
+    coalesce_by = None
 
 
 class CustomerSubscriptionTrialWillEndWebhook(CustomerSubscriptionBaseWebhook):
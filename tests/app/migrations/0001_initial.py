@@ -0,0 +1,1171 @@
+# Generated by Django 3.2.25 on 2026-10-17 23:39
+
+from django.conf import settings
+import django.contrib.postgres.fields
+import django.contrib.postgres.fields.citext
+from django.contrib.postgres.operations import CITextExtension
+from django.db import migrations, models
+import django.db.models.deletion
+import stripe_integrations.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        CITextExtension(),
+        migrations.CreateModel(
+            name="Coupon",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        blank=True,
+                        help_text="Name of the coupon displayed to customers on for instance invoices or receipts",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "applies_to",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Contains information about what product this coupon applies to. This field is not included by default. To include it in the response, expand the applies_to field",
+                        null=True,
+                    ),
+                ),
+                (
+                    "amount_off",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Amount (in the currency specified) that will be taken off the subtotal of any invoices for this customer",
+                        max_digits=9,
+                        null=True,
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("usd", "USD")],
+                        default="usd",
+                        help_text="If amount_off has been set, the three-letter ISO code for the currency of the amount to take off",
+                        max_length=3,
+                    ),
+                ),
+                (
+                    "duration",
+                    models.CharField(
+                        choices=[
+                            ("once", "Once"),
+                            ("repeating", "Repeating"),
+                            ("forever", "Forever"),
+                        ],
+                        default="once",
+                        help_text="One of forever, once, and repeating. Describes how long a customer who applies this coupon will get the discount",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "duration_in_months",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Required only if duration is repeating, in which case it must be a positive integer that specifies the number of months the discount will be in effect",
+                        null=True,
+                    ),
+                ),
+                (
+                    "max_redemptions",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="A positive integer specifying the number of times the coupon can be redeemed before it’s no longer valid",
+                        null=True,
+                    ),
+                ),
+                (
+                    "percent_off",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Percent that will be taken off the subtotal of any invoices for this customer for the duration of the coupon",
+                        null=True,
+                    ),
+                ),
+                (
+                    "redeem_by",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date after which the coupon can no longer be redeemed",
+                        null=True,
+                    ),
+                ),
+                (
+                    "times_redeemed",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Number of times this coupon has been applied to a customer",
+                        null=True,
+                    ),
+                ),
+                ("valid", models.BooleanField(default=False)),
+                ("date_purged", models.DateTimeField(editable=False, null=True)),
+                (
+                    "sync_generation",
+                    models.BigIntegerField(db_index=True, default=0, editable=False),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="Customer",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "name",
+                    models.TextField(
+                        blank=True,
+                        help_text="The customer's full name or business name",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        blank=True,
+                        help_text="An arbitrary string attached to the object. Often useful for displaying to users.",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "email",
+                    django.contrib.postgres.fields.citext.CIEmailField(
+                        blank=True, db_index=True, max_length=254
+                    ),
+                ),
+                (
+                    "address",
+                    models.JSONField(
+                        blank=True, help_text="The customer's address", null=True
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Current balance (in cents), if any, being stored on the customer's account. If negative, the customer has credit to apply to the next invoice. If positive, the customer has an amount owed that will be added to the next invoice. The balance does not refer to any unpaid invoices; it solely takes into account amounts that have yet to be successfully applied to any invoice. This balance is only taken into account for recurring billing purposes (i.e., subscriptions, invoices, invoice items)",
+                        max_digits=9,
+                        null=True,
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("usd", "USD")],
+                        default="usd",
+                        help_text="The currency the customer can be charged in for recurring billing purposes",
+                        max_length=3,
+                    ),
+                ),
+                (
+                    "delinquent",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether or not the latest charge for the customer's latest invoice has failed",
+                    ),
+                ),
+                ("default_source", models.TextField(blank=True)),
+                (
+                    "shipping",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Shipping information associated with the customer",
+                        null=True,
+                    ),
+                ),
+                (
+                    "tax_exempt",
+                    models.CharField(
+                        choices=[
+                            ("exempt", "Exempt"),
+                            ("reverse", "Reverse"),
+                            ("none", "None"),
+                        ],
+                        default="none",
+                        help_text='Describes the customer\'s tax exemption status. When set to reverse, invoice and receipt PDFs include the text "Reverse charge"',
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "preferred_locales",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(
+                            blank=True, default="", max_length=255
+                        ),
+                        default=[],
+                        help_text="The customer's preferred locales (languages), ordered by preference",
+                        size=None,
+                    ),
+                ),
+                (
+                    "invoice_prefix",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="The prefix for the customer used to generate unique invoice numbers",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "invoice_settings",
+                    models.JSONField(
+                        blank=True,
+                        help_text="The customer's default invoice settings",
+                        null=True,
+                    ),
+                ),
+                (
+                    "date_purged",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stripe_customers",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="Product",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "active",
+                    models.BooleanField(
+                        help_text="Whether the product is currently available for purchase."
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        help_text="The product’s description, meant to be displayable to the customer. Use this field to optionally store a long form explanation of the product being sold for your own rendering purposes.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="The product’s name, meant to be displayable to the customer. Whenever this product is sold via a subscription, name will show up on associated invoice line item descriptions.",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "statement_descriptor",
+                    models.TextField(
+                        help_text="Extra information about a product which will appear on your customer’s credit card statement.In the case that multiple products are billed at once, the first statement descriptor will be used.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "tax_code",
+                    models.CharField(
+                        help_text="A tax code ID.", max_length=255, null=True
+                    ),
+                ),
+                (
+                    "unit_label",
+                    models.CharField(
+                        help_text="A label that represents units of this product in Stripe and on customers’ receipts and invoices.When set, this will be included in associated invoice line item descriptions.",
+                        max_length=255,
+                        null=True,
+                    ),
+                ),
+                (
+                    "images",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        help_text="A list of up to 8 URLs of images for this product, meant to be displayable to the customer.",
+                        size=8,
+                    ),
+                ),
+                (
+                    "shippable",
+                    models.BooleanField(
+                        help_text="Whether this product is shipped (i.e., physical goods).",
+                        null=True,
+                    ),
+                ),
+                (
+                    "package_dimensions",
+                    models.JSONField(
+                        help_text="The dimensions of this product for shipping purposes.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "url",
+                    models.URLField(
+                        help_text="A URL of a publicly-accessible webpage for this product.",
+                        max_length=500,
+                        null=True,
+                    ),
+                ),
+                (
+                    "created",
+                    models.BigIntegerField(
+                        help_text="Time at which the object was created. Measured in seconds since the Unix epoch"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.BigIntegerField(
+                        help_text="Time at which the object was last updated. Measured in seconds since the Unix epoch"
+                    ),
+                ),
+                ("date_purged", models.DateTimeField(editable=False, null=True)),
+                (
+                    "sync_generation",
+                    models.BigIntegerField(db_index=True, default=0, editable=False),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SyncState",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                (
+                    "resource",
+                    models.CharField(
+                        help_text="Name of the synced resource, e.g. events or products",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether the resource is synced from live mode or test mode",
+                    ),
+                ),
+                (
+                    "cursor",
+                    models.CharField(
+                        blank=True,
+                        help_text="Stripe id of the last synced object of an interrupted sync",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "last_created",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Creation time of the newest synced object. Measured in seconds since the Unix epoch",
+                        null=True,
+                    ),
+                ),
+                (
+                    "generation",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Start time of the current full sync, which marks the objects it synced. Measured in seconds since the Unix epoch",
+                        null=True,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "unique_together": {("resource", "livemode")},
+            },
+        ),
+        migrations.CreateModel(
+            name="Subscription",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "items",
+                    models.JSONField(
+                        blank=True,
+                        help_text="List of subscription items, each with an attached price.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "application_fee_percent",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="A positive decimal that represents the fee percentage of the subscription invoice amount that will be transferred to the application owner's Stripe account each billing period.",
+                        max_digits=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "automatic_tax",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Automatic tax settings for this subscription.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "billing_cycle_anchor",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Determines the date of the first full invoice, and, for plans with `month` or `year` intervals, the day of the month for subsequent invoices",
+                        null=True,
+                    ),
+                ),
+                (
+                    "billing_thresholds",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Define thresholds at which an invoice will be sent, and the subscription advanced to a new billing period",
+                        null=True,
+                    ),
+                ),
+                (
+                    "cancel_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="A date in the future at which the subscription will automatically get canceled",
+                        null=True,
+                    ),
+                ),
+                (
+                    "cancel_at_period_end",
+                    models.BooleanField(
+                        default=False,
+                        help_text="If the subscription has been canceled with the ``at_period_end`` flag set to true, ``cancel_at_period_end`` on the subscription will be true. We can use this attribute to determine whether a subscription that has a status of active is scheduled to be canceled at the end of the current period",
+                    ),
+                ),
+                (
+                    "canceled_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="If the subscription has been canceled, the date of that cancellation. If the subscription was canceled with ``cancel_at_period_end``, canceled_at will still reflect the date of the initial cancellation request, not the end of the subscription period when the subscription is automatically moved to a canceled state",
+                        null=True,
+                    ),
+                ),
+                (
+                    "cancellation_details",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Details about why this subscription was cancelled",
+                        null=True,
+                    ),
+                ),
+                (
+                    "collection_method",
+                    models.CharField(
+                        choices=[
+                            ("charge_automatically", "Charge Automatically"),
+                            ("send_invoice", "Send_Invoice"),
+                        ],
+                        help_text="Either `charge_automatically`, or `send_invoice`. When charging automatically, Stripe will attempt to pay this subscription at the end of the cycle using the default source attached to the customer. When sending an invoice, Stripe will email us customer an invoice with payment instructions",
+                        max_length=32,
+                    ),
+                ),
+                (
+                    "current_period_end",
+                    models.DateTimeField(
+                        help_text="End of the current period for which the subscription has been invoiced. At the end of this period, a new invoice will be created"
+                    ),
+                ),
+                (
+                    "current_period_start",
+                    models.DateTimeField(
+                        help_text="Start of the current period for which the subscription has been invoiced"
+                    ),
+                ),
+                (
+                    "days_until_due",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Number of days a customer has to pay invoices generated by this subscription. This value will be `null` for subscriptions where `billing=charge_automatically`",
+                        null=True,
+                    ),
+                ),
+                ("default_payment_method", models.TextField(blank=True)),
+                ("default_source", models.TextField(blank=True)),
+                ("default_tax_rates", models.JSONField(blank=True, null=True)),
+                ("discount", models.JSONField(blank=True, null=True)),
+                (
+                    "ended_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="If the subscription has ended (either because it was canceled or because the customer was switched to a subscription to a new plan), the date the subscription ended",
+                        null=True,
+                    ),
+                ),
+                (
+                    "next_pending_invoice_item_invoice",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Specifies the approximate timestamp on which any pending invoice items will be billed according to the schedule provided at pending_invoice_item_interval",
+                        null=True,
+                    ),
+                ),
+                (
+                    "pause_collection",
+                    models.JSONField(
+                        blank=True,
+                        help_text="If specified, payment collection for this subscription will be paused.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "pending_invoice_item_interval",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Specifies an interval for how often to bill for any pending invoice items. It is analogous to calling Create an invoice for the given subscription at the specified interval",
+                        null=True,
+                    ),
+                ),
+                ("pending_setup_intent", models.TextField(blank=True)),
+                (
+                    "pending_update",
+                    models.JSONField(
+                        blank=True,
+                        help_text="If specified, pending updates that will be applied to the subscription once the latest_invoice has been paid",
+                        null=True,
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="The quantity applied to this subscription. This value will be `null` for multi-plan subscriptions",
+                        null=True,
+                    ),
+                ),
+                (
+                    "start_date",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date when the subscription was first created. The date might differ from the created date due to backdating",
+                        null=True,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("incomplete", "Incomplete"),
+                            ("incomplete_expired", "Incomplete Expired"),
+                            ("trialing", "Trialing"),
+                            ("active", "Active"),
+                            ("past_due", "Past Due"),
+                            ("canceled", "Canceled"),
+                            ("unpaid", "Unpaid"),
+                        ],
+                        help_text="The status of this subscription",
+                        max_length=32,
+                    ),
+                ),
+                (
+                    "trial_end",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="If the subscription has a trial, the end of that trial",
+                        null=True,
+                    ),
+                ),
+                (
+                    "trial_start",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="If the subscription has a trial, the beginning of that trial",
+                        null=True,
+                    ),
+                ),
+                (
+                    "trial_settings",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Settings related to subscription trials.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "latest_invoice",
+                    models.CharField(
+                        blank=True,
+                        help_text="The most recent invoice this subscription has generated.",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subscriptions",
+                        to="app.customer",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="Price",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "active",
+                    models.BooleanField(
+                        help_text="Whether the price can be used for new purchases."
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("usd", "USD")],
+                        help_text="Three-letter ISO currency code, in lowercase. Must be a supported currency.",
+                        max_length=3,
+                    ),
+                ),
+                (
+                    "nickname",
+                    models.CharField(
+                        help_text="A brief description of the price, hidden from customers.",
+                        max_length=255,
+                        null=True,
+                    ),
+                ),
+                (
+                    "recurring",
+                    models.JSONField(
+                        help_text="The recurring components of a price such as interval and usage_type.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("one_time", "One Time"), ("recurring", "Recurring")],
+                        help_text="One of one_time or recurring depending on whether the price is for a one-time purchase or a recurring (subscription) purchase.",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "custom_unit_amount",
+                    models.JSONField(
+                        help_text="When set, provides configuration for the amount to be adjusted by the customer during Checkout Sessions and Payment Links.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "unit_amount",
+                    models.BigIntegerField(
+                        help_text="The unit amount in cents to be charged, represented as a whole integer if possible. Null if a sub-cent precision is required",
+                        null=True,
+                    ),
+                ),
+                (
+                    "unit_amount_decimal",
+                    models.DecimalField(
+                        decimal_places=12,
+                        help_text="The unit amount in cents to be charged, represented as a decimal string with at most 12 decimal places",
+                        max_digits=19,
+                        null=True,
+                    ),
+                ),
+                (
+                    "billing_scheme",
+                    models.CharField(
+                        choices=[("per_unit", "Per Unit"), ("tiered", "Tiered")],
+                        help_text="Describes how to compute the price per period. Either per_unit or tiered.per_unit indicates that the fixed amount (specified in unit_amount or unit_amount_decimal)will be charged per unit in quantity (for prices with usage_type=licensed),or per unit of total usage (for prices with usage_type=metered). tiered indicates that the unitpricing will be computed using a tiering strategy as defined using the tiers and tiers_mode attributes.",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "tax_behavior",
+                    models.CharField(
+                        choices=[
+                            ("inclusive", "TAX Inclusive"),
+                            ("exclusive", "TAX Exclusive"),
+                            ("inclusive", "TAX Unspecified"),
+                        ],
+                        help_text="Specifies whether the price is considered inclusive of taxes or exclusive of taxes.One of inclusive, exclusive, or unspecified. Once specified as either inclusive or exclusive, it cannot be changed.",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "tiers",
+                    models.JSONField(
+                        help_text="Each element represents a pricing tier. This parameter requires billing_scheme to be set to tiered.See also the documentation for billing_scheme. This field is not included by default.To include it in the response, expand the tiers field.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "tiers_mode",
+                    models.CharField(
+                        help_text="Defines if the tiering price should be graduated or volume based.In volume-based tiering, the maximum quantity within a period determines the per unit price.In graduated tiering, pricing can change as the quantity grows.",
+                        max_length=32,
+                        null=True,
+                    ),
+                ),
+                (
+                    "transform_quantity",
+                    models.JSONField(
+                        help_text="Apply a transformation to the reported usage or set quantity before computing the amount billed. Cannot be combined with tiers.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "lookup_key",
+                    models.CharField(
+                        help_text="A lookup key used to retrieve prices dynamically from a static string. This may be up to 200 characters.",
+                        max_length=255,
+                        null=True,
+                    ),
+                ),
+                (
+                    "created",
+                    models.BigIntegerField(
+                        help_text="Time at which the object was created. Measured in seconds since the Unix epoch"
+                    ),
+                ),
+                ("date_purged", models.DateTimeField(editable=False, null=True)),
+                (
+                    "sync_generation",
+                    models.BigIntegerField(db_index=True, default=0, editable=False),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prices",
+                        to="app.product",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="Event",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                ("kind", models.CharField(max_length=255)),
+                ("valid", models.BooleanField(null=True)),
+                ("processed", models.BooleanField(default=False)),
+                (
+                    "request",
+                    models.JSONField(
+                        help_text="Information on the API request that instigated the event, If null, the event was automatic (e.g., Stripe’s automatic subscription handling)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "pending_webhooks",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of webhooks that have yet to be successfully delivered (i.e., to return a 20x response) to the URLs we’ve specified",
+                    ),
+                ),
+                ("api_version", models.CharField(blank=True, max_length=128)),
+                (
+                    "target_id",
+                    models.CharField(
+                        blank=True,
+                        help_text="Stripe id of the customer, or else the object, the event applies to",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "failed_attempts",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of times processing the event has failed",
+                    ),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When the event was claimed by a worker processing it",
+                        null=True,
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When the processing of a failed event is retried",
+                        null=True,
+                    ),
+                ),
+                ("webhook_message", stripe_integrations.fields.CompressedJSONField()),
+                (
+                    "validated_message",
+                    stripe_integrations.fields.CompressedJSONField(
+                        blank=True, null=True
+                    ),
+                ),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="app.customer",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="Card",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("stripe_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "livemode",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Has the value true if the object exists in live mode orthe value false if the object exists in test mode.",
+                    ),
+                ),
+                (
+                    "metadata",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Set of key-value pairs that you can attach to an object.This can be useful for storing additional information about the object in a structured format.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "payload_hash",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        help_text="Hash of the synced data of the object, used to skip writing the object when it is unchanged",
+                        max_length=64,
+                    ),
+                ),
+                ("name", models.TextField(blank=True, null=True)),
+                ("address_line_1", models.TextField(blank=True, null=True)),
+                (
+                    "address_line_1_check",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("address_line_2", models.TextField(blank=True, null=True)),
+                ("address_city", models.TextField(blank=True, null=True)),
+                ("address_state", models.TextField(blank=True, null=True)),
+                ("address_country", models.TextField(blank=True, null=True)),
+                ("address_zip", models.TextField(blank=True, null=True)),
+                (
+                    "address_zip_check",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("brand", models.TextField(blank=True, null=True)),
+                ("country", models.CharField(blank=True, max_length=2, null=True)),
+                ("cvc_check", models.CharField(blank=True, max_length=32, null=True)),
+                (
+                    "dynamic_last4",
+                    models.CharField(blank=True, max_length=4, null=True),
+                ),
+                (
+                    "tokenization_method",
+                    models.CharField(blank=True, max_length=32, null=True),
+                ),
+                ("exp_month", models.IntegerField()),
+                ("exp_year", models.IntegerField()),
+                ("funding", models.CharField(blank=True, max_length=15, null=True)),
+                ("last4", models.CharField(blank=True, max_length=4, null=True)),
+                ("fingerprint", models.TextField(blank=True, null=True)),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cards",
+                        to="app.customer",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["processed", "created_at"], name="app_event_process_aa3cc3_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["kind", "created_at"], name="app_event_kind_4f30d0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(
+                    ("processed", False), models.Q(("valid", False), _negated=True)
+                ),
+                fields=["created_at"],
+                name="app_event_pending",
+            ),
+        ),
+    ]
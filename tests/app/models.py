@@ -0,0 +1,58 @@
+# Third Party Stuff
+from django.contrib.auth.models import User
+from django.db import models
+
+# Stripe Integrations Stuff
+from stripe_integrations.fields import CompressedJSONField
+from stripe_integrations.models import (
+    StripeBaseCard,
+    StripeBaseCoupon,
+    StripeBaseCustomer,
+    StripeBaseEvent,
+    StripeBasePrice,
+    StripeBaseProduct,
+    StripeBaseSubscription,
+    StripeBaseSyncState,
+)
+
+
+class Customer(StripeBaseCustomer):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="stripe_customers"
+    )
+
+
+class Card(StripeBaseCard):
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, related_name="cards"
+    )
+
+
+class Subscription(StripeBaseSubscription):
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, related_name="subscriptions"
+    )
+
+
+class Product(StripeBaseProduct):
+    pass
+
+
+class Price(StripeBasePrice):
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="prices"
+    )
+
+
+class Coupon(StripeBaseCoupon):
+    pass
+
+
+class Event(StripeBaseEvent):
+    customer = models.ForeignKey(Customer, null=True, on_delete=models.SET_NULL)
+    webhook_message = CompressedJSONField()
+    validated_message = CompressedJSONField(null=True, blank=True)
+
+
+class SyncState(StripeBaseSyncState):
+    pass
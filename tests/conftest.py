@@ -0,0 +1,74 @@
+# Standard Library
+import os
+import sys
+
+# Third Party Stuff
+import django
+import pytest
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.test.utils import setup_databases, teardown_databases
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+STRIPE_CONFIG = {
+    "CUSTOMER_MODEL": "tests.app.models.Customer",
+    "CARD_MODEL": "tests.app.models.Card",
+    "SUBSCRIPTION_MODEL": "tests.app.models.Subscription",
+    "PRODUCT_MODEL": "tests.app.models.Product",
+    "PRICE_MODEL": "tests.app.models.Price",
+    "COUPON_MODEL": "tests.app.models.Coupon",
+    "EVENT_MODEL": "tests.app.models.Event",
+    "SYNC_STATE_MODEL": "tests.app.models.SyncState",
+}
+
+
+def pytest_configure():
+    settings.configure(
+        SECRET_KEY="tests",
+        USE_TZ=True,
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+        # the tests using the `db` fixture are skipped without a database
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.postgresql",
+                "NAME": os.environ.get("POSTGRES_DB", "stripe_integrations"),
+                "USER": os.environ.get("POSTGRES_USER", "postgres"),
+                "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+                "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+                "PORT": os.environ.get("POSTGRES_PORT", ""),
+            }
+        },
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "django.contrib.postgres",
+            "stripe_integrations",
+            "tests.app",
+        ],
+        STRIPE_CONFIG=STRIPE_CONFIG,
+    )
+    django.setup()
+
+
+@pytest.fixture(scope="session")
+def database():
+    """
+    Creates the test database, with the tables of the test app models
+    """
+    try:
+        old_config = setup_databases(verbosity=0, interactive=False)
+    except OperationalError as e:
+        pytest.skip("PostgreSQL is not available: {}".format(e))
+    yield
+    teardown_databases(old_config, verbosity=0)
+
+
+@pytest.fixture
+def db(database):
+    """
+    Runs the test in a transaction which is rolled back afterwards
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
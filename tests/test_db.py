@@ -0,0 +1,202 @@
+# Standard Library
+import json
+import time
+from datetime import timedelta
+
+# Third Party Stuff
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeCustomer, StripeProduct
+from stripe_integrations.actions.sync import StripeSyncState
+from stripe_integrations.db import bulk_insert, bulk_upsert, count_writes
+from stripe_integrations.fields import decompress
+from tests.app.models import Customer, Event, Product
+
+pytestmark = pytest.mark.usefixtures("db")
+
+
+def product_data(stripe_id, **data):
+    """
+    Returns the data of a product, as listed by stripe
+    """
+    return dict(
+        {
+            "id": stripe_id,
+            "object": "product",
+            "active": True,
+            "description": None,
+            "metadata": {},
+            "name": "Product {}".format(stripe_id),
+            "statement_descriptor": None,
+            "tax_code": None,
+            "unit_label": None,
+            "images": [],
+            "shippable": None,
+            "package_dimensions": None,
+            "url": None,
+            "livemode": False,
+            "created": 1686089970,
+            "updated": 1686089970,
+        },
+        **data
+    )
+
+
+def product(stripe_id, **data):
+    """
+    Returns an unsaved product object
+    """
+    return Product(
+        stripe_id=stripe_id,
+        **StripeProduct.get_defaults(product_data(stripe_id, **data))
+    )
+
+
+def test_bulk_insert_skips_existing_rows():
+    product("prod_1", name="Existing").save()
+
+    inserted = bulk_insert(
+        Product,
+        [
+            product("prod_1", name="Duplicate"),
+            product("prod_2", name="New"),
+            product("prod_2", name="Repeated"),
+        ],
+    )
+
+    assert [obj.name for obj in inserted] == ["New"]
+    assert not inserted[0]._state.adding
+    assert dict(Product.objects.values_list("stripe_id", "name")) == {
+        "prod_1": "Existing",
+        "prod_2": "New",
+    }
+
+
+def test_bulk_upsert_maps_primary_keys():
+    existing = product("prod_1", name="Old")
+    existing.save()
+
+    products = bulk_upsert(
+        Product,
+        [
+            product("prod_1", name="Updated"),
+            product("prod_2", name="First"),
+            product("prod_2", name="Last"),
+        ],
+        update_fields=["name"],
+        batch_size=1,
+    )
+
+    rows = {obj.stripe_id: obj for obj in Product.objects.all()}
+    assert len(products) == 2
+    for obj in products:
+        assert obj.pk == rows[obj.stripe_id].pk
+        assert not obj._state.adding
+    # existing rows keep their primary key, the last object of a key wins
+    assert rows["prod_1"].pk == existing.pk
+    assert rows["prod_1"].name == "Updated"
+    assert rows["prod_2"].name == "Last"
+
+
+@override_settings(STRIPE_CONFIG=dict(settings.STRIPE_CONFIG, SYNC_SKIP_UNCHANGED=True))
+def test_bulk_upsert_changed_skips_unchanged():
+    with count_writes() as counts:
+        products = StripeProduct.sync_many([product_data("prod_1")])
+    assert (counts.written, counts.unchanged) == (1, 0)
+    modified_at = Product.objects.get().modified_at
+
+    with count_writes() as counts:
+        unchanged = StripeProduct.sync_many([product_data("prod_1")])
+    assert (counts.written, counts.unchanged) == (0, 1)
+    assert unchanged[0].pk == products[0].pk
+    assert Product.objects.get().modified_at == modified_at
+
+    with count_writes() as counts:
+        StripeProduct.sync_many([product_data("prod_1", name="Renamed")])
+    assert (counts.written, counts.unchanged) == (1, 0)
+    assert Product.objects.get().name == "Renamed"
+
+
+@override_settings(STRIPE_CONFIG=dict(settings.STRIPE_CONFIG, SYNC_SKIP_UNCHANGED=True))
+def test_bulk_upsert_changed_touches_unchanged():
+    StripeProduct.sync_many([product_data("prod_1")], generation=1)
+
+    with count_writes() as counts:
+        StripeProduct.sync_many([product_data("prod_1")], generation=2)
+
+    assert counts.unchanged == 1
+    assert Product.objects.get().sync_generation == 2
+
+
+def test_sweep_soft_deletes_stale_objects():
+    generation = int(time.time())
+    StripeProduct.sync_many(
+        [product_data("prod_synced"), product_data("prod_deleted")],
+        generation=generation - 60,
+    )
+    # the previous sync found both products, this sync only the first one
+    StripeProduct.sync_many([product_data("prod_synced")], generation=generation)
+    Product.objects.update(modified_at=timezone.now() - timedelta(minutes=1))
+    # created by a webhook while the sync was running
+    product("prod_new").save()
+
+    assert StripeSyncState.sweep(Product, [generation]) == 1
+    purged = Product.objects.filter(date_purged__isnull=False)
+    assert list(purged.values_list("stripe_id", flat=True)) == ["prod_deleted"]
+
+
+def test_sweep_keeps_objects_of_every_shard():
+    generation = int(time.time())
+    StripeProduct.sync_many([product_data("prod_1")], generation=generation)
+    StripeProduct.sync_many([product_data("prod_2")], generation=generation + 1)
+    StripeProduct.sync_many([product_data("prod_3")], generation=generation - 60)
+    Product.objects.update(modified_at=timezone.now() - timedelta(minutes=1))
+
+    assert StripeSyncState.sweep(Product, [generation, generation + 1]) == 1
+    assert Product.objects.get(date_purged__isnull=False).stripe_id == "prod_3"
+
+
+def test_customer_sweep():
+    user = User.objects.create(username="customer")
+    for stripe_id in ["cus_b", "cus_A", "cus_a", ""]:
+        Customer.objects.create(user=user, stripe_id=stripe_id)
+    started = timezone.now()
+    Customer.objects.create(user=user, stripe_id="cus_new")
+
+    assert StripeCustomer.sweep(["cus_A", "cus_b"], started) == 1
+
+    active = Customer.objects.filter(is_active=True)
+    assert sorted(active.values_list("stripe_id", flat=True)) == [
+        "",
+        "cus_A",
+        "cus_b",
+        "cus_new",
+    ]
+    assert Customer.objects.get(stripe_id="cus_a").date_purged is not None
+
+
+def test_compressed_json_field_round_trip():
+    message = {"id": "evt_1", "data": {"object": {"id": "cus_1", "name": "Jenny"}}}
+    Event.objects.create(
+        stripe_id="evt_1", kind="customer.updated", webhook_message=message
+    )
+
+    event = Event.objects.get()
+    assert event.webhook_message == message
+    assert event.validated_message is None
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT webhook_message FROM app_event")
+        stored = bytes(cursor.fetchone()[0])
+    assert stored != json.dumps(message).encode()
+    assert json.loads(decompress(stored)) == message
+
+    # serialized as plain json, e.g. when events are archived
+    field = Event._meta.get_field("webhook_message")
+    assert field.value_to_string(event) == message
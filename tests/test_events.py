@@ -0,0 +1,243 @@
+# Standard Library
+import itertools
+from datetime import timedelta
+from unittest import mock
+
+# Third Party Stuff
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeEvent
+from stripe_integrations.webhooks.products import ProductBaseWebhook
+from stripe_integrations.webhooks.subscriptions import CustomerSubscriptionBaseWebhook
+from tests.app.models import Customer, Event
+
+QUEUE_CONFIG = dict(
+    settings.STRIPE_CONFIG,
+    EVENT_PROCESSING_MODE="queue",
+    WEBHOOK_VALIDATION="signature",
+)
+
+pytestmark = pytest.mark.usefixtures("db")
+
+CREATED = 1686089970
+
+_ids = itertools.count()
+
+
+def event_data(kind, obj, created=CREATED):
+    """
+    Returns the data of an event, as sent by stripe
+    """
+    return {
+        "id": "evt_{}".format(next(_ids)),
+        "object": "event",
+        "api_version": "2022-11-15",
+        "created": created,
+        "data": {"object": obj},
+        "livemode": False,
+        "pending_webhooks": 1,
+        "request": {"id": None, "idempotency_key": None},
+        "type": kind,
+    }
+
+
+def queue(*events_data):
+    """
+    Adds events to the queue, created in the given order
+    Returns:
+        list of the stripe ids of the events
+    """
+    StripeEvent.add_many(events_data, group_by_kind=False)
+    stripe_ids = [data["id"] for data in events_data]
+    created_at = timezone.now() - timedelta(minutes=1)
+    for index, stripe_id in enumerate(stripe_ids):
+        Event.objects.filter(stripe_id=stripe_id).update(
+            created_at=created_at + timedelta(seconds=index)
+        )
+    return stripe_ids
+
+
+@pytest.fixture(autouse=True)
+def queue_mode():
+    with override_settings(STRIPE_CONFIG=QUEUE_CONFIG):
+        yield
+
+
+def pending():
+    return list(StripeEvent.get_pending().values_list("stripe_id", flat=True))
+
+
+@pytest.fixture
+def process_product():
+    """
+    Records the events processed by the product webhooks
+    """
+    with mock.patch.object(ProductBaseWebhook, "process_webhook", autospec=True) as m:
+        yield m
+
+
+def processed(process_webhook):
+    return [call.args[0].event.stripe_id for call in process_webhook.call_args_list]
+
+
+def test_add_deduplicates_events():
+    data = event_data("product.updated", {"id": "prod_1"})
+    kwargs = dict(
+        stripe_id=data["id"],
+        kind=data["type"],
+        livemode=False,
+        api_version=data["api_version"],
+        message=data,
+    )
+
+    assert StripeEvent.add(**kwargs) is not None
+    assert StripeEvent.add(**kwargs) is None
+    assert Event.objects.count() == 1
+
+
+def test_add_many_deduplicates_events():
+    existing = event_data("product.updated", {"id": "prod_1"})
+    new = event_data("product.updated", {"id": "prod_2"})
+    StripeEvent.add_many([existing])
+
+    outcomes = StripeEvent.add_many([existing, new, new])
+
+    assert outcomes == {
+        existing["id"]: StripeEvent.DUPLICATE,
+        new["id"]: StripeEvent.QUEUED,
+    }
+    assert Event.objects.count() == 2
+
+
+def test_claim_pending():
+    stripe_ids = queue(
+        event_data("product.updated", {"id": "prod_1"}),
+        event_data("product.updated", {"id": "prod_2"}),
+    )
+
+    claimed = StripeEvent.claim_pending(batch_size=10)
+
+    assert [event.stripe_id for event in claimed] == stripe_ids
+    assert all(event.claimed_at is not None for event in claimed)
+    # claimed by another worker
+    assert StripeEvent.claim_pending(batch_size=10) == []
+
+    # the worker didn't finish the events within the claim timeout
+    Event.objects.update(claimed_at=timezone.now() - timedelta(seconds=301))
+    claimed = StripeEvent.claim_pending(batch_size=1)
+    assert [event.stripe_id for event in claimed] == stripe_ids[:1]
+
+
+def test_retry_delay():
+    assert [StripeEvent.get_retry_delay(attempts) for attempts in range(1, 9)] == [
+        60,
+        120,
+        240,
+        480,
+        960,
+        1920,
+        3600,
+        3600,
+    ]
+
+
+def test_failed_event_retried_with_backoff(process_product):
+    failed, newer = queue(
+        event_data("product.created", {"id": "prod_1"}),
+        event_data("product.updated", {"id": "prod_1"}),
+    )
+    process_product.side_effect = [Exception("Stripe is down"), None, None]
+
+    assert StripeEvent.process_pending() == 2
+
+    # the newer event of the product waits for the failed one
+    assert processed(process_product) == [failed]
+    event = Event.objects.get(stripe_id=failed)
+    assert (event.processed, event.failed_attempts) == (False, 1)
+    assert event.claimed_at is None
+    delay = event.next_attempt_at - timezone.now()
+    assert timedelta(seconds=55) < delay <= timedelta(seconds=60)
+    assert pending() == []
+
+    Event.objects.filter(stripe_id=failed).update(next_attempt_at=timezone.now())
+    assert pending() == [failed]
+    StripeEvent.process_pending()
+    StripeEvent.process_pending()
+
+    assert processed(process_product) == [failed, failed, newer]
+    assert Event.objects.filter(processed=True).count() == 2
+
+
+def test_events_of_a_customer_kept_in_order():
+    user = User.objects.create(username="customer")
+    Customer.objects.create(user=user, stripe_id="cus_1")
+    subscription = {"id": "sub_1", "object": "subscription", "customer": "cus_1"}
+    failed, newer, other = queue(
+        event_data("customer.subscription.created", subscription),
+        event_data("customer.subscription.updated", subscription),
+        event_data("product.updated", {"id": "prod_1"}),
+    )
+    Event.objects.filter(stripe_id=failed).update(
+        failed_attempts=1, next_attempt_at=timezone.now() + timedelta(minutes=1)
+    )
+
+    # other customers and objects are not held back
+    assert pending() == [other]
+
+    with mock.patch.object(
+        CustomerSubscriptionBaseWebhook, "process_webhook", autospec=True
+    ) as process_subscription:
+        Event.objects.filter(stripe_id=failed).update(next_attempt_at=None)
+        StripeEvent.process_pending(batch_size=1)
+        StripeEvent.process_pending(batch_size=1)
+
+    assert processed(process_subscription) == [failed, newer]
+    assert Event.objects.get(stripe_id=newer).customer.stripe_id == "cus_1"
+
+
+@override_settings(STRIPE_CONFIG=dict(QUEUE_CONFIG, EVENT_MAX_ATTEMPTS=2))
+def test_abandoned_event_blocks_until_requeued():
+    abandoned, newer, other = queue(
+        event_data("product.created", {"id": "prod_1"}),
+        event_data("product.updated", {"id": "prod_1"}),
+        event_data("product.updated", {"id": "prod_2"}),
+    )
+    Event.objects.filter(stripe_id=abandoned).update(failed_attempts=2)
+
+    assert pending() == [other]
+    assert list(StripeEvent.get_abandoned()) == [Event.objects.get(stripe_id=abandoned)]
+
+    assert StripeEvent.requeue() == 1
+    assert pending() == [abandoned, newer, other]
+    assert Event.objects.get(stripe_id=abandoned).failed_attempts == 0
+
+
+@override_settings(STRIPE_CONFIG=dict(QUEUE_CONFIG, EVENT_COALESCE_WINDOW=60))
+def test_coalesce_events_of_an_object(process_product):
+    first, second, newest, created, late, other = queue(
+        event_data("product.updated", {"id": "prod_1"}, created=CREATED),
+        event_data("product.updated", {"id": "prod_1"}, created=CREATED + 20),
+        event_data("product.updated", {"id": "prod_1"}, created=CREATED + 60),
+        # only events of the same kind are coalesced
+        event_data("product.created", {"id": "prod_1"}, created=CREATED),
+        # outside of the window of the first event
+        event_data("product.updated", {"id": "prod_1"}, created=CREATED + 61),
+        event_data("product.updated", {"id": "prod_2"}, created=CREATED),
+    )
+    sent = []
+
+    with mock.patch("stripe_integrations.webhooks.base.registry.get_signal") as get:
+        get.return_value.send.side_effect = lambda **kwargs: sent.append(
+            [event.stripe_id for event in kwargs["superseded"]]
+        )
+        assert StripeEvent.process_pending() == 6
+
+    assert processed(process_product) == [newest, created, late, other]
+    # only the signal of the newest event of a group is sent
+    assert sent == [[first, second], [], [], []]
+    assert not Event.objects.filter(processed=False).exists()
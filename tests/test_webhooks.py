@@ -0,0 +1,134 @@
+# Standard Library
+import json
+import time
+from unittest import mock
+
+# Third Party Stuff
+import pytest
+import stripe
+from django.test import override_settings
+
+# Stripe Integrations Stuff
+from stripe_integrations.actions import StripeWebhook
+from stripe_integrations.exceptions import StripeSignatureException
+
+SECRET = "whsec_test_secret"
+
+# recorded from a test mode endpoint
+PAYLOAD = json.dumps(
+    {
+        "id": "evt_1NG8Du2eZvKYlo2CUI79vXWy",
+        "object": "event",
+        "api_version": "2022-11-15",
+        "created": 1686089970,
+        "data": {
+            "object": {
+                "id": "cus_9s6XKzkNRiz8i3",
+                "object": "customer",
+                "email": "jenny.rosen@example.com",
+                "livemode": False,
+                "metadata": {},
+            },
+            "previous_attributes": {"email": None},
+        },
+        "livemode": False,
+        "pending_webhooks": 1,
+        "request": {"id": "req_NMCbBjJ8VB7tQg", "idempotency_key": None},
+        "type": "customer.updated",
+    }
+)
+
+STRIPE_CONFIG = {
+    "WEBHOOK_VALIDATION": "signature",
+    "WEBHOOK_SECRET": SECRET,
+    "WEBHOOK_TOLERANCE": 300,
+}
+
+
+def sign(payload, timestamp=None, secret=SECRET):
+    """
+    Returns the Stripe-Signature header of a payload, as sent by stripe
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = stripe.WebhookSignature._compute_signature(
+        "{}.{}".format(timestamp, payload), secret
+    )
+    return "t={},v1={}".format(timestamp, signature)
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setattr(stripe, "api_key", "sk_test_key")
+    monkeypatch.setattr(StripeWebhook, "_seen_events", None)
+
+
+@pytest.fixture
+def add_event():
+    with mock.patch("stripe_integrations.actions.events.StripeEvent.add") as add:
+        yield add
+
+
+@override_settings(STRIPE_CONFIG=STRIPE_CONFIG)
+def test_valid_signature(add_event):
+    StripeWebhook.process_signed_webhook(PAYLOAD.encode(), sign(PAYLOAD))
+
+    add_event.assert_called_once()
+    kwargs = add_event.call_args.kwargs
+    assert kwargs["stripe_id"] == "evt_1NG8Du2eZvKYlo2CUI79vXWy"
+    assert kwargs["kind"] == "customer.updated"
+    assert kwargs["message"] == json.loads(PAYLOAD)
+
+
+@override_settings(STRIPE_CONFIG=STRIPE_CONFIG)
+def test_bad_signature(add_event):
+    with pytest.raises(StripeSignatureException):
+        StripeWebhook.process_signed_webhook(
+            PAYLOAD, sign(PAYLOAD, secret="whsec_other_secret")
+        )
+    with pytest.raises(StripeSignatureException):
+        StripeWebhook.process_signed_webhook(
+            PAYLOAD.replace("jenny.rosen", "mallory"), sign(PAYLOAD)
+        )
+    add_event.assert_not_called()
+
+
+@override_settings(STRIPE_CONFIG=STRIPE_CONFIG)
+def test_expired_timestamp(add_event):
+    with pytest.raises(StripeSignatureException):
+        StripeWebhook.process_signed_webhook(
+            PAYLOAD, sign(PAYLOAD, timestamp=int(time.time()) - 301)
+        )
+    add_event.assert_not_called()
+
+
+@override_settings(STRIPE_CONFIG=dict(STRIPE_CONFIG, EVENT_DEDUP_CACHE_SIZE=10))
+def test_duplicate_delivery_cached(add_event):
+    StripeWebhook.process_signed_webhook(PAYLOAD, sign(PAYLOAD))
+    StripeWebhook.process_signed_webhook(PAYLOAD, sign(PAYLOAD))
+
+    add_event.assert_called_once()
+
+
+@override_settings(STRIPE_CONFIG=STRIPE_CONFIG)
+def test_duplicate_delivery_stored(add_event):
+    # the event was already inserted, e.g. by another process
+    add_event.side_effect = [mock.Mock(), None]
+
+    StripeWebhook.process_signed_webhook(PAYLOAD, sign(PAYLOAD))
+    StripeWebhook.process_signed_webhook(PAYLOAD, sign(PAYLOAD))
+
+    assert add_event.call_count == 2
+
+
+@override_settings(STRIPE_CONFIG=STRIPE_CONFIG)
+def test_unsigned_webhook_refused(add_event):
+    with pytest.raises(StripeSignatureException):
+        StripeWebhook.process_webhook(json.loads(PAYLOAD))
+    add_event.assert_not_called()
+
+
+@override_settings(STRIPE_CONFIG={"WEBHOOK_VALIDATION": "retrieve"})
+def test_unsigned_webhook_retrieve_mode(add_event):
+    StripeWebhook.process_webhook(json.loads(PAYLOAD))
+
+    add_event.assert_called_once()